@@ -39,29 +39,57 @@ class ChainMap(collections.abc.Mapping):
         a collection of maps in order, by key, and returning the
         first found. As in a regular dict, a KeyError is raised
         if the key is not found in any map.
+
+        The union of keys is only computed when the ChainMap
+        is enumerated, so lookups alone stay cheap.
     '''
 
     def __init__(self, *maps):
         self._maps = maps
 
-        self._keys = set([])
+        self._keys = None
+
+
+    def _allkeys(self):
+        if self._keys is None:
+            self._keys = set([])
+
+            for amap in self._maps:
+                self._keys.update(amap)
 
-        for amap in self._maps:
-            self._keys.update(amap)
+        return self._keys
 
 
     def __len__(self):
-        return len(self._keys)
+        return len(self._allkeys())
 
 
     def __iter__(self):
-        for key in self._keys:
+        for key in self._allkeys():
             yield key
 
 
+    def __contains__(self, key):
+        for d in self._maps:
+            if key in d:
+                return True
+
+        return False
+
+
     def __getitem__(self, key):
         for d in self._maps:
             if key in d:
                 return d[key]
 
         raise KeyError(key)
+
+
+    def flatten(self):
+        ''' Return a plain dict holding the value found for each key. '''
+        flat = {}
+
+        for amap in reversed(self._maps):
+            flat.update(amap)
+
+        return flat
@@ -31,6 +31,8 @@
 #
 
 import os
+import threading
+import types
 try:
     import configparser
 except:
@@ -51,29 +53,74 @@ class ConfigDictionary(object):
             'TEMPLATE_DIRECTORY_SUFFIX':'tpl',
             'WORK_DIRECTORY':default_working_directory,
             'ENV_OVERLAYS_ALLOW':'',
-            'IGNORE_RUN_WITH_SUDO':'yes'
+            'IGNORE_RUN_WITH_SUDO':'yes',
+            'PUBLISH_FILE_PLACEMENT':'copy',
+            'SUPERVISE_DAEMONS':'no'
         },
         'overlays': {
         },
     }
 
+    # Parsed configuration files are shared by all instances in the
+    # process. Each entry maps the configuration file name to the
+    # file state (modification time, size, inode) it was parsed from
+    # and the resulting parser, read only raw sections and memo of
+    # interpolated values, and is reparsed when the file (or the
+    # ETCECONFIGDIR it is found through) changes. Values are
+    # interpolated on first lookup, so one bad value only fails
+    # lookups of that value.
+    _cache = {}
+
+    _cache_lock = threading.Lock()
+
     def __init__(self,
                  configfilename='etce',
                  defaults=defaults):
-        self.parser = configparser.ConfigParser()
-        self.parser.optionxform = str # leave case
-
         config_dir = os.getenv('ETCECONFIGDIR', '/etc/etce')
 
-        configfiles = [os.path.join(config_dir, '%s.conf' % configfilename)]
+        configfile = os.path.join(config_dir, '%s.conf' % configfilename)
+
+        try:
+            st = os.stat(configfile)
+
+            filestate = (st.st_mtime_ns, st.st_size, st.st_ino)
+        except OSError:
+            filestate = None
+
+        # only configurations built from the class defaults are shared
+        if not defaults is ConfigDictionary.defaults:
+            self._parser, self._sections, self._values = self._parse(configfile, defaults)
+            return
+
+        with ConfigDictionary._cache_lock:
+            cached = ConfigDictionary._cache.get(configfile)
+
+            if not cached or cached[0] != filestate:
+                cached = (filestate,) + self._parse(configfile, defaults)
+
+                ConfigDictionary._cache[configfile] = cached
+
+            _, self._parser, self._sections, self._values = cached
+
+
+    @classmethod
+    def invalidate(cls):
+        '''Discard all cached configurations so that they are reread.'''
+        with cls._cache_lock:
+            cls._cache.clear()
+
+
+    def _parse(self, configfile, defaults):
+        parser = configparser.ConfigParser()
+        parser.optionxform = str # leave case
 
         # read function should not cause error if any of the named files
         # don't exist. Duplicate values are overlayed by values found
         # later in the list.
-        self.parser.read(configfiles)
+        parser.read([configfile])
 
-        if self.parser.has_option('etce', 'WORK_DIRECTORY'):
-            user_specified_workdir = self.parser.get('etce', 'WORK_DIRECTORY')
+        if parser.has_option('etce', 'WORK_DIRECTORY'):
+            user_specified_workdir = parser.get('etce', 'WORK_DIRECTORY')
 
             # enforce that user specified WORK_DIRECTORY is an absolute path
             if not user_specified_workdir[0] == '/':
@@ -96,43 +143,63 @@ class ConfigDictionary(object):
 
 
         for section, namevals in defaults.items():
-            if not self.parser.has_section(section):
-                self.parser.add_section(section)
+            if not parser.has_section(section):
+                parser.add_section(section)
 
             for name, val in namevals.items():
-                if not self.parser.has_option(section, name):
-                    self.parser.set(section, name, val)
+                if not parser.has_option(section, name):
+                    parser.set(section, name, val)
+
+        sections = {}
+
+        for section in parser.sections():
+            sections[section] = types.MappingProxyType(dict(parser.items(section, raw=True)))
+
+        return parser, types.MappingProxyType(sections), {}
+
+
+    def _value(self, section, key):
+        try:
+            return self._values[(section, key)]
+        except KeyError:
+            value = self._parser.get(section, key)
+
+            self._values[(section, key)] = value
+
+            return value
 
 
     def get(self, section, key, default=None):
-        if self.parser.has_option(section, key):
-            return self.parser.get(section, key)
+        if key in self._sections.get(section, {}):
+            return self._value(section, key)
         return default
 
 
     def sections(self):
-        return self.parser.sections()
+        return list(self._sections)
 
 
     def items(self, section):
-        return self.parser.items(section)
+        if not section in self._sections:
+            raise configparser.NoSectionError(section)
+        return [(key, self._value(section, key)) for key in self._sections[section]]
 
 
     def asdict(self):
         retdict = {}
         for section in self.sections():
             retdict[section] = {}
-            for n, v in sorted(self.parser.items(section)):
+            for n, v in sorted(self.items(section)):
                 retdict[section][n] = v
         return retdict
 
 
     def __str__(self):
         retstr = ''
-        for section in self.parser.sections():
+        for section in self.sections():
             retstr += '\n[ ' + section + ' ]\n'
             pairs = [name + ':' + str(value) \
-                     for name, value in sorted(self.parser.items(section))]
+                     for name, value in sorted(self.items(section))]
             retstr += '\n'.join(pairs)
             retstr += '\n'
         return retstr
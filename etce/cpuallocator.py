@@ -0,0 +1,132 @@
+#
+# Copyright (c) 2026 - Adjacent Link LLC, Bridgewater, New Jersey
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in
+#   the documentation and/or other materials provided with the
+#   distribution.
+# * Neither the name of Adjacent Link LLC nor the names of its
+#   contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+
+import glob
+import os
+import re
+
+import etce.utils
+
+
+class CPUAllocator(object):
+    '''
+    Assign cores from a host's CPU pool to containers. Each request
+    takes the least loaded cores, preferring the requested NUMA node
+    and then the node with the most free cores, so containers are
+    packed onto distinct cores while any remain and only share
+    cores, evenly, once the pool is exhausted.
+    '''
+
+    def __init__(self, cpus, topology=None):
+        '''
+        cpus is the list of core numbers in the pool. topology maps
+        each core to its NUMA node, read from /sys when None.
+        '''
+        if topology is None:
+            topology = CPUAllocator.read_topology()
+
+        self._cpus = sorted(set(cpus))
+
+        self._nodes = dict([(cpu, topology.get(cpu, 0)) for cpu in self._cpus])
+
+        self._load = dict([(cpu, 0) for cpu in self._cpus])
+
+
+    @staticmethod
+    def read_topology(sysdir='/sys/devices/system/node'):
+        '''
+        Return a dictionary of core number to NUMA node number, empty
+        where the kernel exposes no NUMA information.
+        '''
+        topology = {}
+
+        for cpulistfile in glob.glob(os.path.join(sysdir, 'node*', 'cpulist')):
+            node = int(re.search(r'node(\d+)', cpulistfile).group(1))
+
+            with open(cpulistfile) as cpulistf:
+                for cpu in etce.utils.nodestr_to_nodelist(cpulistf.read().strip()):
+                    topology[cpu] = node
+
+        return topology
+
+
+    def allocate(self, count, numanode=None):
+        '''
+        Assign count cores. Returns the sorted list of cores and the
+        sorted list of the NUMA nodes they belong to.
+        '''
+        if count < 1:
+            raise ValueError('CPU count must be at least 1. Quitting.')
+
+        minload = min(self._load.values())
+
+        free = {}
+
+        for cpu, load in self._load.items():
+            if load == minload:
+                free[self._nodes[cpu]] = free.get(self._nodes[cpu], 0) + 1
+
+        def rank(cpu):
+            node = self._nodes[cpu]
+
+            return (self._load[cpu],
+                    node != numanode,
+                    -free.get(node, 0),
+                    node,
+                    cpu)
+
+        assigned = sorted(sorted(self._cpus, key=rank)[:count])
+
+        if len(assigned) < count:
+            raise ValueError('Cannot assign %d CPUs from a pool of %d. Quitting.' % \
+                             (count, len(self._cpus)))
+
+        for cpu in assigned:
+            self._load[cpu] += 1
+
+        return assigned, sorted(set([self._nodes[cpu] for cpu in assigned]))
+
+
+def cpulist_str(cpus):
+    '''
+    Format a list of cores as a kernel cpu list string, "0-3,8".
+    '''
+    ranges = []
+
+    for cpu in sorted(cpus):
+        if ranges and ranges[-1][1] == cpu - 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+
+    return ','.join([str(first) if first == last else '%d-%d' % (first, last)
+                     for first, last in ranges])
@@ -32,6 +32,8 @@
 
 import os
 import os.path
+import sys
+from concurrent.futures import ThreadPoolExecutor
 
 from etce.testdirectory import TestDirectory
 from etce.stepsfiledoc import StepsFileDoc
@@ -77,28 +79,140 @@ class Executer(object):
 
             wldr = WrapperLoader()
 
+            jobs = []
+
             for wrapperentry, methodname, testargs in wrappers:
                 fullwrappername,wrapperinstance = \
                     wldr.loadwrapper(wrapperentry.name,
                                      self._stepsfiledoc.getpackageprefixes())
 
+                jobs.append((wrapperentry,
+                             methodname,
+                             fullwrappername,
+                             wrapperinstance,
+                             testargs))
+
+            concurrency = self._stepsfiledoc.getconcurrency(stepname)
+
+            if concurrency > 1:
+                self._runconcurrent(jobs, concurrency, hostdir, trialargs)
+                return
+
+            for _, methodname, fullwrappername, wrapperinstance, testargs in jobs:
                 # ensure each wrapper is called with the testdirectory as
                 # the current working directory, and with it's own
                 # instance of the wrapper context
                 os.chdir(hostdir)
 
-                ctx = WrapperContext(WrapperContextImpl(fullwrappername,
-                                                        wrapperinstance,
-                                                        trialargs,
-                                                        testargs,
-                                                        self._config,
-                                                        self._test))
-
-                if methodname == 'run':
-                    # run calls prerun, run, postrun to encourage
-                    #   pre/post condition checks
-                    wrapperinstance.prerun(ctx)
-                    wrapperinstance.run(ctx)
-                    wrapperinstance.postrun(ctx)
-                else:
-                    wrapperinstance.stop(ctx)
+                self._runwrapper(methodname,
+                                 fullwrappername,
+                                 wrapperinstance,
+                                 trialargs,
+                                 testargs)
+
+
+    def _runwrapper(self,
+                    methodname,
+                    fullwrappername,
+                    wrapperinstance,
+                    trialargs,
+                    testargs,
+                    supervise=False):
+        ctximpl = WrapperContextImpl(fullwrappername,
+                                     wrapperinstance,
+                                     trialargs,
+                                     testargs,
+                                     self._config,
+                                     self._test,
+                                     supervise)
+
+        ctx = WrapperContext(ctximpl)
+
+        try:
+            if methodname == 'run':
+                # run calls prerun, run, postrun to encourage
+                #   pre/post condition checks
+                wrapperinstance.prerun(ctx)
+                wrapperinstance.run(ctx)
+                wrapperinstance.postrun(ctx)
+            else:
+                wrapperinstance.stop(ctx)
+        finally:
+            ctximpl.flushstore()
+
+
+    def _runconcurrent(self, jobs, concurrency, hostdir, trialargs):
+        '''
+        Run the step's wrappers on up to concurrency threads. A wrapper
+        starts once the wrappers named in its "after" attribute have
+        finished, and is skipped if any of them failed. Failures are
+        reported together once every wrapper has finished.
+
+        Forking from the worker threads is unsafe, so ctx.daemonize
+        launches through the node supervisor here. A wrapper that forks
+        by itself must not let its child return to the worker, where
+        it would go on to run queued wrappers, so a child that ends
+        with SystemExit, or any other exception, exits immediately.
+        '''
+        # the working directory is process wide, set it once for all
+        os.chdir(hostdir)
+
+        futures = {}
+
+        executerpid = os.getpid()
+
+        def runjob(job, dependencies):
+            wrapperentry, methodname, fullwrappername, wrapperinstance, testargs = job
+
+            for name, future in dependencies:
+                if future.exception():
+                    raise RuntimeError('skipped, "%s" failed' % name)
+
+            try:
+                self._runwrapper(methodname,
+                                 fullwrappername,
+                                 wrapperinstance,
+                                 trialargs,
+                                 testargs,
+                                 supervise=True)
+            except BaseException as e:
+                if os.getpid() == executerpid:
+                    raise
+
+                sys.stdout.flush()
+                sys.stderr.flush()
+
+                os._exit(e.code if isinstance(e, SystemExit) and isinstance(e.code, int) else 1)
+
+            if os.getpid() != executerpid:
+                # a forked child that returned from the wrapper
+                sys.stdout.flush()
+                sys.stderr.flush()
+
+                os._exit(0)
+
+        # dependencies are always listed earlier in the step and so
+        # are dequeued before the wrappers that wait on them
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            submitted = []
+
+            for job in jobs:
+                wrapperentry = job[0]
+
+                dependencies = [(name, futures[name]) for name in wrapperentry.after]
+
+                future = executor.submit(runjob, job, dependencies)
+
+                # "after" names the most recent wrapper entry with that name
+                futures[wrapperentry.name] = future
+
+                submitted.append((wrapperentry.name, future))
+
+        errors = [(name, future.exception()) for name, future in submitted
+                  if future.exception()]
+
+        if len(errors) == 1:
+            raise errors[0][1]
+
+        if errors:
+            raise RuntimeError('\n'.join(['%s: %s' % (name, str(e)) for name, e in errors]))
@@ -0,0 +1,244 @@
+#
+# Copyright (c) 2026 - Adjacent Link LLC, Bridgewater, New Jersey
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in
+#   the documentation and/or other materials provided with the
+#   distribution.
+# * Neither the name of Adjacent Link LLC nor the names of its
+#   contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+
+import errno
+import os
+import tempfile
+from collections import OrderedDict
+
+import etce.utils
+
+
+class HostsFile(object):
+    '''
+    An /etc/hosts style file parsed once into its unmanaged lines and
+    named blocks of ETCE generated entries, with the addresses and
+    aliases of each indexed for collision checks. Blocks written by
+    different callers (one per LXC field) coexist in the same file.
+    '''
+
+    OPENTAG = '#### Start auto-generated ETCE control mappings'
+
+    CLOSETAG = '#### Stop auto-generated ETCE control mappings'
+
+    def __init__(self, filename='/etc/hosts'):
+        self._filename = filename
+
+        self._lines = []
+
+        self._blocks = OrderedDict()
+
+        if os.path.exists(filename):
+            with open(filename, 'r') as hostsf:
+                self._parse(hostsf)
+
+        self._unmanaged_addresses, self._unmanaged_aliases = \
+            self._index(self._entries(self._lines))
+
+
+    @property
+    def filename(self):
+        return self._filename
+
+
+    def blocknames(self):
+        return list(self._blocks.keys())
+
+
+    def block(self, blockname):
+        return list(self._blocks.get(blockname, []))
+
+
+    def collisions(self, blockname, entries):
+        '''
+        Return the sorted addresses and aliases in entries, a list of
+        (address, alias) pairs, that already appear in the file outside
+        of block blockname.
+        '''
+        addresses, aliases = self._index(entries)
+
+        collided = (addresses & self._unmanaged_addresses) | \
+                   (aliases & self._unmanaged_aliases)
+
+        for name, blockentries in self._blocks.items():
+            if name == blockname:
+                continue
+
+            blockaddresses, blockaliases = self._index(blockentries)
+
+            collided |= (addresses & blockaddresses) | (aliases & blockaliases)
+
+        return sorted(collided)
+
+
+    def setblock(self, blockname, entries):
+        self._blocks[blockname] = sorted(entries)
+
+
+    def removeblock(self, blockname):
+        return self._blocks.pop(blockname, None) is not None
+
+
+    def write(self):
+        '''
+        Write the file atomically, through a temporary file in the
+        same directory renamed over the original.
+        '''
+        content = self._format()
+
+        dirname = os.path.dirname(os.path.abspath(self._filename))
+
+        mode = 0o644
+
+        if os.path.exists(self._filename):
+            mode = os.stat(self._filename).st_mode & 0o7777
+
+        fd, tmpfile = tempfile.mkstemp(dir=dirname, prefix='.hosts.')
+
+        try:
+            with os.fdopen(fd, 'w') as tmpf:
+                tmpf.write(content)
+
+                tmpf.flush()
+
+                os.fchmod(tmpf.fileno(), mode)
+
+                os.fsync(tmpf.fileno())
+
+            os.replace(tmpfile, self._filename)
+        except OSError as e:
+            os.remove(tmpfile)
+
+            # bind mounted files (/etc/hosts in a container) cannot
+            # be replaced, fall back to rewriting in place
+            if not e.errno in (errno.EBUSY, errno.EXDEV):
+                raise
+
+            with open(self._filename, 'w') as hostsf:
+                hostsf.write(content)
+
+
+    @staticmethod
+    def update(blockname, entries, filename='/etc/hosts'):
+        '''
+        Replace block blockname in filename with entries, or remove
+        it when entries is None, holding an exclusive lock across the
+        read and the write. Returns the list of collisions, in which
+        case the file is not changed.
+        '''
+        with etce.utils.locked_directory(os.path.dirname(os.path.abspath(filename))):
+            hostsfile = HostsFile(filename)
+
+            # an unnamed block predates named blocks and was written
+            # by a field that always replaced it, replace it here too
+            legacy = hostsfile.removeblock('')
+
+            if entries is None:
+                if hostsfile.removeblock(blockname) or legacy:
+                    hostsfile.write()
+
+                return []
+
+            collided = hostsfile.collisions(blockname, entries)
+
+            if collided:
+                return collided
+
+            hostsfile.setblock(blockname, entries)
+
+            hostsfile.write()
+
+            return []
+
+
+    def _parse(self, hostsf):
+        blockname = None
+
+        for line in hostsf:
+            if blockname is None:
+                if line.startswith(HostsFile.OPENTAG):
+                    # blocks written before blocks were named
+                    # have an empty name
+                    blockname = line[len(HostsFile.OPENTAG):].strip().lstrip(':').strip()
+
+                    self._blocks[blockname] = []
+                else:
+                    self._lines.append(line)
+
+            elif line.startswith(HostsFile.CLOSETAG):
+                blockname = None
+
+            else:
+                self._blocks[blockname].extend(self._entries([line]))
+
+        # strip trailing blank lines, one is added back before the blocks
+        while self._lines and not self._lines[-1].strip():
+            self._lines.pop()
+
+
+    def _entries(self, lines):
+        entries = []
+
+        for line in lines:
+            fields = line.split('#', 1)[0].split()
+
+            for alias in fields[1:]:
+                entries.append((fields[0], alias))
+
+        return entries
+
+
+    def _index(self, entries):
+        return (set([address for address, _ in entries]),
+                set([alias for _, alias in entries]))
+
+
+    def _format(self):
+        content = ''.join(self._lines)
+
+        if content and not content.endswith('\n'):
+            content += '\n'
+
+        for blockname, entries in self._blocks.items():
+            content += '\n'
+
+            if blockname:
+                content += '%s: %s\n' % (HostsFile.OPENTAG, blockname)
+            else:
+                content += '%s\n' % HostsFile.OPENTAG
+
+            for address, alias in entries:
+                content += '%s %s\n' % (address, alias)
+
+            content += '%s\n' % HostsFile.CLOSETAG
+
+        return content
@@ -36,12 +36,27 @@ import os
 from signal import SIGQUIT
 from etce.platform import Platform
 from etce.config import ConfigDictionary
+from etce.supervisorclient import SupervisorClient
 
 
 class Kill(object):
     def kill(self, signal=SIGQUIT, sudo=True):
         p = Platform()
 
+        # supervised daemons are stopped, by process group, first
+        try:
+            result = SupervisorClient().shutdown(signal)
+
+            for pid in result['signalled']:
+                print('killed supervised process "%d"' % pid)
+
+            for failure in result['failed']:
+                print('failed to kill supervised process "%d": %s' % \
+                      (failure['pid'], failure['error']))
+        except (OSError, RuntimeError, ValueError) as e:
+            # still stop the pidfile daemons
+            print('failed to shut down the supervisor: %s' % str(e))
+
         my_pidfile_toks = ('etce', p.hostname())
 
         lockfiledir = os.path.join(ConfigDictionary().get('etce', 'WORK_DIRECTORY'),
@@ -35,17 +35,46 @@ from __future__ import absolute_import, division, print_function
 import datetime
 import os
 import re
+import select
 import shlex
 import socket
+import struct
 import subprocess
 import sys
+import time
 
 import etce.platformimpl
 import etce.utils
-from etce.apprunner import AppRunner
+
+
+# rtnetlink multicast group for link state changes
+_RTMGRP_LINK = 0x1
+
+# net_device flags bit for an administratively up interface
+_IFF_UP = 0x1
+
+# netlink message types, flags and attributes used for address dumps
+_NLMSG_ERROR = 0x2
+_NLMSG_DONE = 0x3
+_NLM_F_REQUEST = 0x1
+_NLM_F_DUMP = 0x300
+_RTM_NEWADDR = 20
+_RTM_GETADDR = 22
+_IFA_ADDRESS = 1
+_IFA_LOCAL = 2
+
+_NLMSGHDR = struct.Struct('=IHHII')
+_IFADDRMSG = struct.Struct('=BBBBI')
+_RTATTR = struct.Struct('=HH')
 
 
 class PlatformImpl(etce.platformimpl.PlatformImpl):
+    # seconds _get_local_ip_addresses results are reused
+    LOCAL_ADDRESSES_TTL = 2.0
+
+    # (time, addresses) from the last address dump
+    _local_addresses = None
+
     def hostname_has_local_address(self, hostname):
         return self.hostnames_has_local_address([hostname])
 
@@ -66,57 +95,108 @@ class PlatformImpl(etce.platformimpl.PlatformImpl):
         return False
 
 
-    def getnetworkdevicenames(self):
-        runner = AppRunner('ip link show')
-
-        devices = []
+    def getlocaladdresses(self):
+        return self._get_local_ip_addresses()
 
-        devmatcher = re.compile(r'^\d+: (\w+):')
 
-        for line in runner.stdout():
-            match = devmatcher.match(line.decode())
+    def getnetworkdevicenames(self):
+        '''
+        The network device names in /sys/class/net, in interface
+        index order as ip link show lists them.
+        '''
+        devices = []
 
-            if match:
-                devices.append(match.group(1))
+        for device in os.listdir('/sys/class/net'):
+            try:
+                with open('/sys/class/net/%s/ifindex' % device) as indexf:
+                    devices.append((int(indexf.read()), device))
+            except (IOError, ValueError):
+                pass
 
-        return devices
+        return [ device for _, device in sorted(devices) ]
 
 
     def adddeviceaddress(self, interface, address):
+        PlatformImpl._local_addresses = None
+
         if not os.system('ip addr add %s dev %s' % (address, interface)) == 0:
             raise RuntimeError('Failed to assign %s to %s network interface' % \
                                     (address, interface))
 
 
     def removedeviceaddress(self, interface, address):
+        PlatformImpl._local_addresses = None
+
         if not os.system('ip addr del %s dev %s' % (address, interface)) == 0:
             raise RuntimeError('Failed to remove %s from %s network interface' % \
                                     (address, interface))
 
 
     def isdeviceup(self, device):
-        #10: br1:  <BROADCAST,MULTICAST,UP,LOWER_UP> mtu 1500 qdisc noqueue state UP mode DEFAULT group default
-        devicematcher = re.compile(r'\d+: %s(?:@\w+)?: <(.*)>' % device)
+        return self._deviceisup(device)
 
-        command = 'ip link show %s' % device
 
-        e = AppRunner(command)
+    def waitfordevices(self, devices, timeout):
+        '''
+        Wait up to timeout seconds for the named network devices to
+        be up, rechecking their flags in /sys/class/net whenever the
+        kernel announces a link change on an rtnetlink socket. Falls
+        back to polling when netlink is unavailable.
+        '''
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
 
-        for line in e.stdout():
-            match = devicematcher.match(line.decode())
-            if match:
-                attributes = match.group(1).split(',')
-                return 'UP' in attributes
+            sock.bind((0, _RTMGRP_LINK))
+        except (OSError, AttributeError):
+            return etce.platformimpl.PlatformImpl.waitfordevices(self, devices, timeout)
 
-        return False
+        deadline = time.time() + timeout
+
+        pending = list(devices)
+
+        with sock:
+            sock.setblocking(False)
+
+            while True:
+                pending = [ device for device in pending if not self._deviceisup(device) ]
+
+                remaining = deadline - time.time()
+
+                if not pending or remaining <= 0:
+                    return pending
+
+                # recheck at least once a second in case events were dropped
+                readable, _, _ = select.select([sock], [], [], min(remaining, 1.0))
+
+                if readable:
+                    self._drain(sock)
+
+
+    def _deviceisup(self, device):
+        try:
+            with open('/sys/class/net/%s/flags' % device) as flagsf:
+                return bool(int(flagsf.read(), 16) & _IFF_UP)
+        except (IOError, ValueError):
+            return False
+
+
+    def _drain(self, sock):
+        while True:
+            try:
+                sock.recv(65536)
+            except BlockingIOError:
+                return
+            except OSError:
+                # ENOBUFS on overrun, the recheck covers the lost events
+                return
 
 
     def networkinterfaceup(self, interface):
         if not os.system('ip link set %s up' % interface) == 0:
             raise RuntimeError('Failed to up %s network interface' % \
                                     interface)
-        while os.system('ip link show %s > /dev/null' % interface) != 0:
-            time.sleep(1)
+        while not os.path.exists('/sys/class/net/%s' % interface):
+            time.sleep(0.1)
 
 
     def networkinterfacedown(self, interface):
@@ -125,44 +205,131 @@ class PlatformImpl(etce.platformimpl.PlatformImpl):
                                     interface)
 
     def bridgeup(self, bridgename, addifs, enablemulticastsnooping):
-        self.runcommand('ip link add %s type bridge' % bridgename)
+        self.bridgesup([(bridgename, addifs, [])], enablemulticastsnooping)
+
+
+    def bridgedown(self, bridgename, addifs):
+        self.bridgesdown([(bridgename, addifs)])
+
+
+    def bridgesup(self, bridges, enablemulticastsnooping):
+        '''
+        Create, address and bring up each (bridgename, addifs, addresses)
+        bridge in bridges with one "ip -batch" and one "iptables-restore"
+        invocation.
+        '''
+        iplines = []
 
-        self.networkinterfaceup(bridgename)
+        iptableslines = []
 
-        self.runcommand('iptables -I INPUT -i %s -j ACCEPT' % bridgename)
+        for bridgename, addifs, addresses in bridges:
+            # a bridge left from an earlier run is reused, as when
+            # a failed "ip link add" was ignored
+            if not os.path.exists('/sys/class/net/%s' % bridgename):
+                iplines.append('link add %s type bridge' % bridgename)
 
-        self.runcommand('iptables -I FORWARD -i %s -j ACCEPT' % bridgename)
+            iplines.append('link set %s up' % bridgename)
 
-        for interface in addifs:
-            self.runcommand('ip link set dev %s master %s' % (interface, bridgename))
+            for address in addresses:
+                iplines.append('addr add %s dev %s' % (address, bridgename))
 
-            self.runcommand('ip link set %s up' % interface)
+            for interface in addifs:
+                iplines.append('link set dev %s master %s' % (interface, bridgename))
+
+                iplines.append('link set %s up' % interface)
+
+            iptableslines.append('-I INPUT -i %s -j ACCEPT' % bridgename)
+
+            iptableslines.append('-I FORWARD -i %s -j ACCEPT' % bridgename)
+
+        try:
+            self._ipbatch(iplines)
+        finally:
+            PlatformImpl._local_addresses = None
+
+        self._iptablesbatch(iptableslines)
 
         if enablemulticastsnooping:
+            for bridgename, _, _ in bridges:
+                snoopingfile = '/sys/devices/virtual/net/%s/bridge/multicast_snooping' % bridgename
 
-            if os.path.exists('/sys/devices/virtual/net/%s/bridge/multicast_snooping' % bridgename):
+                if os.path.exists(snoopingfile):
+                    with open(snoopingfile, 'w') as sf:
+                        sf.write('0')
+                else:
+                    warning = 'Warning: %s does not exist, ' \
+                        'cannot disable multicast_snooping.' % snoopingfile
 
-                with open('/sys/devices/virtual/net/%s/bridge/multicast_snooping' % bridgename, 'w') as sf:
+                    print(warning, file=sys.stderr)
 
-                    sf.write('0')
-            else:
-                warning = 'Warning: /sys/devices/virtual/net/%s/bridge/multicast_snooping does not exist, ' \
-                    'cannot disable multicast_snooping.' % bridgename
 
-                print(warning, file=sys.stderr)
+    def bridgesdown(self, bridges):
+        '''
+        Remove each (bridgename, addifs) bridge in bridges with one
+        "iptables-restore" and one "ip -batch" invocation.
+        '''
+        iptableslines = []
 
+        iplines = []
 
-    def bridgedown(self, bridgename, addifs):
-        self.runcommand('iptables -D FORWARD -i %s -j ACCEPT' % bridgename)
+        for bridgename, addifs in bridges:
+            iptableslines.append('-D FORWARD -i %s -j ACCEPT' % bridgename)
 
-        self.runcommand('iptables -D INPUT -i %s -j ACCEPT' % bridgename)
+            iptableslines.append('-D INPUT -i %s -j ACCEPT' % bridgename)
 
-        self.networkinterfacedown(bridgename)
+            iplines.append('link set %s down' % bridgename)
 
-        for addif in addifs:
-            self.runcommand('ip link set dev %s nomaster' % addif)
+            for addif in addifs:
+                iplines.append('link set dev %s nomaster' % addif)
 
-        self.runcommand('ip link del %s' % bridgename)
+            iplines.append('link del %s' % bridgename)
+
+        self._iptablesbatch(iptableslines)
+
+        # tear down as much as possible, report rather than raise
+        try:
+            self._ipbatch(iplines)
+        except RuntimeError as e:
+            print(str(e), file=sys.stderr)
+        finally:
+            PlatformImpl._local_addresses = None
+
+
+    def _ipbatch(self, iplines):
+        if not iplines:
+            return
+
+        # -force continues past failed lines so that every failure
+        # is reported at once
+        p = subprocess.Popen(['ip', '-force', '-batch', '-'],
+                             stdin=subprocess.PIPE,
+                             stdout=subprocess.PIPE,
+                             stderr=subprocess.STDOUT,
+                             universal_newlines=True)
+
+        output, _ = p.communicate('\n'.join(iplines) + '\n')
+
+        if p.returncode:
+            raise RuntimeError('ip -batch failed:\n%s\nQuitting.' % output.strip())
+
+
+    def _iptablesbatch(self, iptableslines):
+        if not iptableslines:
+            return
+
+        p = subprocess.Popen(['iptables-restore', '--noflush'],
+                             stdin=subprocess.PIPE,
+                             stdout=subprocess.PIPE,
+                             stderr=subprocess.STDOUT,
+                             universal_newlines=True)
+
+        p.communicate('*filter\n' + '\n'.join(iptableslines) + '\nCOMMIT\n')
+
+        if p.returncode:
+            # iptables-restore applies all rules or none, fall back to
+            # one at a time so that one bad rule doesn't block the rest
+            for line in iptableslines:
+                self.runcommand('iptables %s' % line)
 
 
     def set_igmp_version(self, version):
@@ -180,16 +347,7 @@ class PlatformImpl(etce.platformimpl.PlatformImpl):
 
 
     def getallpids(self):
-        pids = []
-
-        runner = AppRunner('ps --no-headers -eo pid,command')
-
-        for line in runner.stdout():
-            toks = line.decode().strip().split()
-
-            pids.append((int(toks[0]), toks[1]))
-
-        return pids
+        return [ (pid, args[0]) for pid, args in self._processes() ]
 
 
     def getpids(self, command):
@@ -209,11 +367,38 @@ class PlatformImpl(etce.platformimpl.PlatformImpl):
     def ps(self, psregex):
         psmatcher = re.compile(psregex)
 
-        runner = AppRunner('ps -eo args')
+        for _, args in self._processes():
+            line = ' '.join(args)
+
+            if psmatcher.match(line):
+                print(line)
+
+
+    def _processes(self):
+        '''
+        Yield (pid, args) for every process, read from
+        /proc/<pid>/cmdline. Kernel threads, which have no command
+        line, are named "[comm]" as ps shows them.
+        '''
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+
+            try:
+                with open('/proc/%s/cmdline' % entry, 'rb') as cmdlinef:
+                    args = cmdlinef.read().decode(errors='replace').split('\0')
+
+                if args[-1] == '':
+                    args.pop()
 
-        for line in runner.stdout():
-            if psmatcher.match(line.decode()):
-                print(line.strip())
+                if not args:
+                    with open('/proc/%s/comm' % entry) as commf:
+                        args = ['[%s]' % commf.read().strip()]
+            except IOError:
+                # the process exited
+                continue
+
+            yield (int(entry), args)
 
 
     def listdir(self, abspath, fileregex='.*'):
@@ -279,34 +464,113 @@ class PlatformImpl(etce.platformimpl.PlatformImpl):
 
 
     def killall(self, applicationname, signal, sudo):
-        try:
-            command = \
-                "kill -%d $(ps -eo pid,command | " \
-                "awk '/%s[%s] /{print $1}') > /dev/null 2>&1" \
-                % (signal, applicationname[:-1], applicationname[-1])
+        pattern = applicationname + ' '
+
+        pids = [ pid for pid, args in self._processes()
+                 if pattern in ' '.join(args) + ' ' and pid != os.getpid() ]
 
+        if not pids:
+            return
+
+        try:
             if sudo:
-                command = 'sudo ' + command
+                command = ['sudo', 'kill', '-%d' % signal] + [ str(pid) for pid in pids ]
 
-            os.system(command)
+                subprocess.call(command,
+                                stdin=subprocess.DEVNULL,
+                                stdout=subprocess.DEVNULL,
+                                stderr=subprocess.DEVNULL)
+            else:
+                for pid in pids:
+                    try:
+                        os.kill(pid, signal)
+                    except OSError:
+                        pass
 
         except:
             print('problem in killing %s' % applicationname)
 
 
     def _get_local_ip_addresses(self):
+        '''
+        The IPv4 addresses assigned to local interfaces, from an
+        rtnetlink RTM_GETADDR dump. Results are reused for
+        LOCAL_ADDRESSES_TTL seconds, across instances, and dropped
+        when this class adds or removes an address.
+        '''
+        cached = PlatformImpl._local_addresses
+
+        if cached and time.time() - cached[0] < PlatformImpl.LOCAL_ADDRESSES_TTL:
+            return list(cached[1])
+
+        ipaddrs = self._dumpaddresses(socket.AF_INET)
+
+        PlatformImpl._local_addresses = (time.time(), ipaddrs)
+
+        return list(ipaddrs)
+
+
+    def _dumpaddresses(self, family):
+        request = _NLMSGHDR.pack(_NLMSGHDR.size + _IFADDRMSG.size,
+                                 _RTM_GETADDR,
+                                 _NLM_F_REQUEST | _NLM_F_DUMP,
+                                 1,
+                                 0) + \
+                  _IFADDRMSG.pack(family, 0, 0, 0, 0)
+
         ipaddrs = []
 
-        matcher = re.compile(r'inet (\d+.\d+.\d+.\d+)/\d+')
+        with socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE) as sock:
+            sock.bind((0, 0))
+
+            sock.send(request)
+
+            while True:
+                data = sock.recv(65536)
+
+                offset = 0
+
+                while offset + _NLMSGHDR.size <= len(data):
+                    msglen, msgtype, _, _, _ = _NLMSGHDR.unpack_from(data, offset)
+
+                    if msgtype == _NLMSG_DONE:
+                        return ipaddrs
+
+                    if msgtype == _NLMSG_ERROR:
+                        raise RuntimeError('Netlink address dump failed. Quitting.')
+
+                    if msgtype == _RTM_NEWADDR:
+                        address = self._parseaddress(data,
+                                                     offset + _NLMSGHDR.size,
+                                                     offset + msglen)
+
+                        if address:
+                            ipaddrs.append(address)
+
+                    offset += (msglen + 3) & ~3
+
+
+    def _parseaddress(self, data, start, end):
+        addrfamily = _IFADDRMSG.unpack_from(data, start)[0]
+
+        attributes = {}
+
+        offset = start + _IFADDRMSG.size
+
+        while offset + _RTATTR.size <= end:
+            attrlen, attrtype = _RTATTR.unpack_from(data, offset)
+
+            if attrlen < _RTATTR.size:
+                break
 
-        runner = AppRunner('ip addr show')
+            attributes[attrtype] = data[offset + _RTATTR.size:offset + attrlen]
 
-        lines = [line.decode().strip() for line in runner.stdout()]
+            offset += (attrlen + 3) & ~3
 
-        for line in lines:
-            match = matcher.match(line)
+        # IFA_LOCAL is the interface address on point to point links
+        address = attributes.get(_IFA_LOCAL, attributes.get(_IFA_ADDRESS))
 
-            if match:
-                ipaddrs.append(match.group(1))
+        if address is None:
+            return None
 
-        return ipaddrs
+        return socket.inet_ntop(addrfamily, address)
@@ -32,21 +32,72 @@
 #
 
 from __future__ import absolute_import, division, print_function
+import contextlib
 import os
 import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from etce.clientbuilder import ClientBuilder
 from etce.config import ConfigDictionary
+from etce.etceexecuteexception import ETCEExecuteException
 from etce.lxcerror import LXCError
-from etce.lxcmanager import startlxcs, stoplxcs
+from etce.lxcmanager import applylxcs, startlxcs, stoplxcs
 from etce.lxcplanfiledoc import LXCPlanFileDoc
 from etce.platform import Platform
 
 
+@contextlib.contextmanager
+def _plan_snapshot(planfile):
+    '''
+    Copy planfile, keeping its base name, to a temporary directory
+    and yield the absolute name of the copy, for pushing to remote
+    hosts while the local side may change or remove the original.
+    '''
+    snapshotdir = tempfile.mkdtemp(prefix='etce.lxc.')
+
+    try:
+        snapshot = os.path.join(snapshotdir, os.path.basename(planfile))
+
+        shutil.copy(planfile, snapshot)
+
+        yield snapshot
+    finally:
+        shutil.rmtree(snapshotdir, ignore_errors=True)
+
+
+def _start_report(latencies):
+    latencies = latencies or {}
+
+    not_running = sorted([name for name, latency in latencies.items() if latency is None])
+
+    report = '%d of %d containers running.' % \
+             (len(latencies) - len(not_running), len(latencies))
+
+    if not_running:
+        report += ' Not running: %s' % ', '.join(not_running)
+
+    return report
+
+
 def startfield(args):
     this_hostname = Platform().hostname()
 
-    plandoc = LXCPlanFileDoc(args.lxcplanfile)
+    # SSHClient.put changes the working directory of the whole process
+    # while the local start runs, use an absolute plan path
+    lxcplanfile = os.path.abspath(args.lxcplanfile)
+
+    parsestart = time.time()
+
+    plandoc = LXCPlanFileDoc(lxcplanfile)
+
+    if args.profile:
+        numcontainers = sum([len(plandoc.containers(hostname))
+                             for hostname in plandoc.hostnames()])
+
+        print('Parsed LXC plan file "%s" (%d containers) in %.3f seconds.' % \
+              (args.lxcplanfile, numcontainers, time.time() - parsestart))
 
     config = ConfigDictionary()
 
@@ -67,43 +118,56 @@ def startfield(args):
               plandoc.lxc_root_directory(this_hostname)
         raise LXCError(err)
 
-    startlxcs(plandoc,
-              args.writehosts,
-              args.dryrun)
-
-    if not args.dryrun:
-        shutil.copy(args.lxcplanfile, lockfilename)
-
     other_hosts = set(plandoc.hostnames()).difference(
         ['localhost', this_hostname])
 
-    # start containers on other hosts, if any
-    if other_hosts:
-        client = None
-        try:
-            client = ClientBuilder().build(\
-                        other_hosts,
-                        user=args.user,
-                        port=args.port)
+    localstarted = []
 
-            # push the file and execute
-            client.put(args.lxcplanfile, '.', other_hosts, doclobber=True)
+    def startlocal():
+        latencies = startlxcs(plandoc,
+                              args.writehosts,
+                              args.dryrun,
+                              args.concurrency,
+                              args.timeout)
 
-            # on the destination node the netplan file gets pushed to the
-            # ETCE WORK_DIRECTORY
-            command = 'lxcmanager startlxcs %s writehosts=%s ' \
-                      % (os.path.basename(args.lxcplanfile),
-                         args.writehosts)
+        if args.dryrun:
+            return {}
 
-            ret = client.execute(command,
-                                 other_hosts)
+        shutil.copy(lxcplanfile, lockfilename)
 
-            for k in ret:
-                print('[%s] return: %s' % (k, ret[k].retval['result']))
+        localstarted.append(this_hostname)
 
-        finally:
-            if client:
-                client.close()
+        return {this_hostname:_start_report(latencies)}
+
+    def startremote():
+        # on the destination node the netplan file gets pushed to the
+        # ETCE WORK_DIRECTORY
+        command = 'lxcmanager startlxcs %s %s False %d %d' \
+                  % (os.path.basename(lxcplanfile),
+                     args.writehosts,
+                     args.concurrency,
+                     args.timeout)
+
+        ret = _execute_remote(args, lxcplanfile, command, other_hosts)
+
+        return dict([(k, _start_report(ret[k].retval['result'])) for k in ret])
+
+    try:
+        _run_field(this_hostname, startlocal, other_hosts, startremote)
+    except LXCError:
+        # without a lockfile "etce-lxc stop" cannot reach the remote
+        # containers, stop them here rather than orphan them
+        if not args.dryrun and not localstarted and other_hosts:
+            print('Local start failed, stopping [%s]' % ','.join(sorted(other_hosts)))
+
+            command = 'lxcmanager stoplxcs %s' % os.path.basename(lxcplanfile)
+
+            try:
+                _execute_remote(args, lxcplanfile, command, other_hosts)
+            except Exception as e:
+                print('Failed to stop [%s]: %s' % (','.join(sorted(other_hosts)),
+                                                   str(e).strip()))
+        raise
 
 
 def stopfield(args):
@@ -116,32 +180,162 @@ def stopfield(args):
 
     plandoc = LXCPlanFileDoc(lockfilename)
 
+    this_hostname = Platform().hostname()
+
     other_hosts = set(plandoc.hostnames()).difference(
-        ['localhost', Platform().hostname()])
+        ['localhost', this_hostname])
 
-    # stop containers on other hosts, if any
-    try:
-        if other_hosts:
-            client = None
-            try:
-                client = ClientBuilder().build(other_hosts,
-                                               user=args.user,
-                                               port=args.port)
+    def stoplocal():
+        # the lockfile is removed once every host has stopped
+        stoplxcs(plandoc, removeplan=False)
+
+        return {this_hostname:'stopped'}
+
+    def stopremote(planfile):
+        # on the destination node the netplan file gets pushed to the
+        # ETCE WORK_DIRECTORY
+        command = 'lxcmanager stoplxcs %s' % os.path.basename(planfile)
 
-                # push the file and execute
-                client.put(lockfilename, '.', other_hosts, doclobber=True)
+        ret = _execute_remote(args, planfile, command, other_hosts)
 
-                # on the destination node the netplan file gets pushed to the
-                # ETCE WORK_DIRECTORY
-                command = 'lxcmanager stoplxcs %s' % os.path.basename(lockfilename)
+        return dict([(k, 'return: %s' % ret[k].retval['result']) for k in ret])
 
-                ret = client.execute(command, other_hosts)
+    with _plan_snapshot(lockfilename) as planfile:
+        _run_field(this_hostname,
+                   stoplocal,
+                   other_hosts,
+                   lambda: stopremote(planfile))
 
-                for k in ret:
-                    print('[%s] return: %s' % (k, ret[k].retval['result']))
+    # _run_field raises when any host failed, leaving the lockfile
+    # in place so that stop can be run again
+    os.remove(lockfilename)
+
+
+def applyfield(args):
+    workdir = ConfigDictionary().get('etce', 'WORK_DIRECTORY')
+
+    lockfilename = os.path.join(workdir, 'lxcroot', 'etce.lxc.lock')
 
-            finally:
-                if client:
-                    client.close()
+    if not os.path.isfile(lockfilename):
+        raise LXCError('Lockfile "%s" not found. Run "etce-lxc start" first. Quitting.' % \
+                       lockfilename)
+
+    if os.path.basename(args.lxcplanfile) == os.path.basename(lockfilename):
+        raise LXCError('LXC plan file name "%s" is reserved. Quitting.' % \
+                       os.path.basename(lockfilename))
+
+    # SSHClient.put changes the working directory of the whole process
+    lxcplanfile = os.path.abspath(args.lxcplanfile)
+
+    oldplandoc = LXCPlanFileDoc(lockfilename)
+
+    newplandoc = LXCPlanFileDoc(lxcplanfile)
+
+    this_hostname = Platform().hostname()
+
+    # hosts dropped from the new plan are applied too, stopping
+    # everything they run
+    other_hosts = set(oldplandoc.hostnames()).union(newplandoc.hostnames()).difference(
+        ['localhost', this_hostname])
+
+    def applylocal():
+        latencies = applylxcs(oldplandoc,
+                              newplandoc,
+                              args.writehosts,
+                              args.concurrency,
+                              args.timeout)
+
+        return {this_hostname:_start_report(latencies)}
+
+    def applyremote():
+        # both plans are pushed to the ETCE WORK_DIRECTORY on the
+        # destination node
+        command = 'lxcmanager applylxcs %s %s %s %d %d' \
+                  % (os.path.basename(lockfilename),
+                     os.path.basename(lxcplanfile),
+                     args.writehosts,
+                     args.concurrency,
+                     args.timeout)
+
+        ret = _execute_remote(args,
+                              [lockfilename, lxcplanfile],
+                              command,
+                              other_hosts)
+
+        return dict([(k, _start_report(ret[k].retval['result'])) for k in ret])
+
+    _run_field(this_hostname, applylocal, other_hosts, applyremote)
+
+    # the new plan becomes the active plan only once every host
+    # applied it, otherwise stop still tears down the old one
+    shutil.copy(lxcplanfile, lockfilename)
+
+
+def _execute_remote(args, planfiles, command, hosts):
+    if not isinstance(planfiles, list):
+        planfiles = [planfiles]
+
+    client = None
+
+    try:
+        client = ClientBuilder().build(hosts,
+                                       user=args.user,
+                                       port=args.port)
+
+        # push the files and execute
+        for planfile in planfiles:
+            client.put(planfile, '.', hosts, doclobber=True)
+
+        return client.execute(command, hosts)
     finally:
-        stoplxcs(plandoc)
+        if client:
+            client.close()
+
+
+def _run_field(this_hostname, localfunc, other_hosts, remotefunc):
+    '''
+    Run localfunc and, when there are other hosts, remotefunc at the
+    same time. Each returns a dictionary of hostname to report line.
+    Each side's reports are printed, by hostname, as soon as it
+    finishes and failures from either side are raised together in
+    one LXCError once both are done.
+    '''
+    jobs = [([this_hostname], localfunc)]
+
+    if other_hosts:
+        jobs.append((sorted(other_hosts), remotefunc))
+
+    errors = []
+
+    starttime = time.time()
+
+    with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+        futures = {}
+
+        for hosts, func in jobs:
+            print('[%s] in progress' % ','.join(hosts))
+
+            futures[executor.submit(func)] = hosts
+
+        for future in as_completed(futures):
+            hosts = futures[future]
+
+            elapsed = time.time() - starttime
+
+            try:
+                reports = future.result()
+
+                for hostname in sorted(reports):
+                    print('[%s] %s (%.1fs)' % (hostname, reports[hostname], elapsed))
+            except ETCEExecuteException as e:
+                # already one "[host]: error" line per failed host
+                errors.append(str(e).strip())
+
+                print('[%s] failed (%.1fs)' % (','.join(hosts), elapsed))
+            except Exception as e:
+                errors.append('[%s]: %s' % (','.join(hosts), str(e).strip()))
+
+                print('[%s] failed (%.1fs)' % (','.join(hosts), elapsed))
+
+    if errors:
+        raise LXCError('\n'.join(errors))
@@ -31,21 +31,24 @@
 #
 
 from __future__ import absolute_import, division, print_function
+from concurrent.futures import ThreadPoolExecutor
+import errno
+import glob
 import os
-import re
 import socket
 import shutil
 import stat
-import sys
+import subprocess
 import time
-import etce.utils
 
+from etce.hostsfile import HostsFile
 from etce.platform import Platform
 from etce.lxcplanfiledoc import LXCPlanFileDoc
 from etce.lxcerror import LXCError
+from etce.lxcstatemonitor import LXCStateMonitor
 
 
-def startlxcs(lxcplan, writehosts=False, dryrun=False):
+def startlxcs(lxcplan, writehosts=False, dryrun=False, concurrency=8, timeout=30):
     lxcplanfiledoc = lxcplan
 
     if not type(lxcplan) == LXCPlanFileDoc:
@@ -53,14 +56,39 @@ def startlxcs(lxcplan, writehosts=False, dryrun=False):
         lxcplanfiledoc = LXCPlanFileDoc(lxcplan)
 
     try:
-        LXCManagerImpl().start(lxcplanfiledoc,
-                               writehosts=writehosts,
-                               dryrun=dryrun)
+        return LXCManagerImpl().start(lxcplanfiledoc,
+                                      writehosts=writehosts,
+                                      dryrun=dryrun,
+                                      concurrency=concurrency,
+                                      timeout=timeout)
     except Exception as e:
         raise LXCError(e)
 
 
-def stoplxcs(lxcplan):
+def applylxcs(oldlxcplan, newlxcplan, writehosts=False, concurrency=8, timeout=30):
+    oldlxcplanfiledoc = oldlxcplan
+
+    if not type(oldlxcplan) == LXCPlanFileDoc:
+        # assume file name
+        oldlxcplanfiledoc = LXCPlanFileDoc(oldlxcplan)
+
+    newlxcplanfiledoc = newlxcplan
+
+    if not type(newlxcplan) == LXCPlanFileDoc:
+        # assume file name
+        newlxcplanfiledoc = LXCPlanFileDoc(newlxcplan)
+
+    try:
+        return LXCManagerImpl().apply(oldlxcplanfiledoc,
+                                      newlxcplanfiledoc,
+                                      writehosts=writehosts,
+                                      concurrency=concurrency,
+                                      timeout=timeout)
+    except Exception as e:
+        raise LXCError(str(e))
+
+
+def stoplxcs(lxcplan, removeplan=True):
     lxcplanfiledoc = lxcplan
 
     if not type(lxcplan) == LXCPlanFileDoc:
@@ -68,9 +96,9 @@ def stoplxcs(lxcplan):
         lxcplanfiledoc = LXCPlanFileDoc(lxcplan)
 
     try:
-        LXCManagerImpl().stop(lxcplanfiledoc)
+        LXCManagerImpl().stop(lxcplanfiledoc, removeplan)
     except Exception as e:
-        raise LXCError(e.message)
+        raise LXCError(str(e))
 
 
 
@@ -79,14 +107,20 @@ class LXCManagerImpl(object):
         self._platform = Platform()
 
 
-    def start(self, plandoc, writehosts, dryrun=False):
+    def start(self, plandoc, writehosts, dryrun=False, concurrency=8, timeout=30):
+        '''
+        Start the plandoc containers assigned to this host. Returns a
+        dictionary of container name to the number of seconds it took
+        the container to reach the RUNNING state (None for containers
+        that did not start within timeout seconds, or have stopped).
+        '''
         hostname = socket.gethostname().split('.')[0]
         lxcrootdir = plandoc.lxc_root_directory(hostname)
         containers = plandoc.containers(hostname)
 
         if not containers:
             print('No containers assigned to "%s". Skipping.' % hostname)
-            return
+            return {}
 
         if not lxcrootdir[0] == '/':
             print('root_directory "%s" for hostname "%s" is not an absolute path. ' \
@@ -112,18 +146,10 @@ class LXCManagerImpl(object):
             print('No containers assigned to host %s. Quitting.' % hostname)
             return
 
-        # delete and remake the node root
-        if os.path.exists(lxcrootdir):
-            print('Removing contents of "%s" directory.' % lxcrootdir)
-
-            for subentry in os.listdir(lxcrootdir):
-                entry = os.path.join(lxcrootdir, subentry)
-                if os.path.isfile(entry):
-                    os.remove(entry)
-                elif os.path.isdir(entry):
-                    shutil.rmtree(entry)
-        else:
-            os.makedirs(lxcrootdir)
+        # move the old node root out of the way and remake it
+        self._retire(lxcrootdir)
+
+        os.makedirs(lxcrootdir, exist_ok=True)
 
         # set kernelparameters
         kernelparameters = plandoc.kernelparameters(hostname)
@@ -138,33 +164,202 @@ class LXCManagerImpl(object):
         # write hosts file
         if not dryrun:
             if writehosts:
-                self._writehosts(containers)
+                self._writehosts(lxcrootdir, containers)
 
-        # bring up bridge
+        # bring up bridges
         if not dryrun:
+            bridgespecs = []
+
             for _, bridge in plandoc.bridges(hostname).items():
                 if not bridge.persistent:
                     print('Bringing up bridge: %s' % bridge.devicename)
 
-                    self._platform.bridgeup(bridge.devicename,
-                                            bridge.addifs,
-                                            enablemulticastsnooping=True)
-
-                    if not bridge.ipv4 is None:
-                        self._platform.adddeviceaddress(bridge.devicename,
-                                                        bridge.ipv4)
-
-                    if not bridge.ipv6 is None:
-                        self._platform.adddeviceaddress(bridge.devicename,
-                                                        bridge.ipv6)
-
+                    addresses = [address for address in (bridge.ipv4, bridge.ipv6)
+                                 if not address is None]
 
-                    time.sleep(0.1)
+                    bridgespecs.append((bridge.devicename, bridge.addifs, addresses))
 
                 elif not self._platform.isdeviceup(bridge.devicename):
                     raise RuntimeError('Bridge %s marked persistent is not up. Quitting.')
 
+            self._platform.bridgesup(bridgespecs, enablemulticastsnooping=True)
+
         # create container files
+        self._writecontainerfiles(lxcrootdir, containers)
+
+        if dryrun:
+            print('dryrun')
+            return {}
+
+        return self._startnodes(containers, concurrency, timeout)
+
+
+    def stop(self, plandoc, removeplan=True):
+        hostname = self._platform.hostname()
+
+        noderoot = plandoc.lxc_root_directory(hostname)
+
+        for container in plandoc.containers(hostname):
+            command = 'lxc-stop -n %s -k &> /dev/null' % container.lxc_name
+            print(command)
+            os.system(command)
+
+        bridgespecs = []
+
+        for _, bridge in plandoc.bridges(hostname).items():
+            if not bridge.persistent:
+                print('Bringing down bridge: %s' % bridge.devicename)
+                bridgespecs.append((bridge.devicename, bridge.addifs))
+
+        self._platform.bridgesdown(bridgespecs)
+
+        # remove this field's /etc/hosts entries, if any were written
+        if noderoot in HostsFile().blocknames():
+            self._writehosts(noderoot, [])
+
+        if removeplan:
+            os.remove(plandoc.planfile())
+
+
+    def apply(self, oldplandoc, newplandoc, writehosts, concurrency=8, timeout=30):
+        '''
+        Reconfigure the containers and bridges started from oldplandoc on
+        this host to match newplandoc. Only containers whose configuration
+        or init script changed, or that attach to a bridge that changed,
+        are restarted; containers only in oldplandoc are stopped and
+        those only in newplandoc started. A host missing from newplandoc
+        is stopped and one missing from oldplandoc is started. Returns
+        the start latencies of the containers (re)started.
+        '''
+        hostname = self._platform.hostname()
+
+        lxcrootdir = newplandoc.lxc_root_directory(hostname)
+
+        oldlxcrootdir = oldplandoc.lxc_root_directory(hostname)
+
+        # a host dropped from the new plan stops everything it runs,
+        # a host added to it starts from scratch
+        if lxcrootdir is None:
+            if not oldlxcrootdir is None:
+                self.stop(oldplandoc, removeplan=False)
+
+            return {}
+
+        if oldlxcrootdir is None:
+            return self.start(newplandoc,
+                              writehosts,
+                              concurrency=concurrency,
+                              timeout=timeout)
+
+        if lxcrootdir != oldlxcrootdir:
+            raise LXCError('Cannot apply a plan with a different root directory ' \
+                           'to an active lxc field. Run "etce-lxc stop" first. Quitting.')
+
+        oldcontainers = dict([(c.lxc_name, c) for c in oldplandoc.containers(hostname)])
+
+        newcontainers = dict([(c.lxc_name, c) for c in newplandoc.containers(hostname)])
+
+        oldbridges = dict([(b.devicename, b) for b in oldplandoc.bridges(hostname).values()
+                           if not b.persistent])
+
+        newbridges = dict([(b.devicename, b) for b in newplandoc.bridges(hostname).values()
+                           if not b.persistent])
+
+        bridgesdown = sorted([name for name in oldbridges
+                              if not name in newbridges \
+                              or self._bridgekey(oldbridges[name]) != \
+                                 self._bridgekey(newbridges[name])])
+
+        bridgesup = sorted([name for name in newbridges
+                            if not name in oldbridges or name in bridgesdown])
+
+        for _, bridge in newplandoc.bridges(hostname).items():
+            if bridge.persistent and not self._platform.isdeviceup(bridge.devicename):
+                raise LXCError('Bridge %s marked persistent is not up. Quitting.' % \
+                               bridge.devicename)
+
+        def restart(name):
+            if not name in oldcontainers:
+                return False
+
+            oldc = oldcontainers[name]
+
+            newc = newcontainers[name]
+
+            if (str(oldc), oldc.initscript) != (str(newc), newc.initscript):
+                return True
+
+            return any([newplandoc.bridges(hostname)[iname].devicename in bridgesup
+                        for iname in newc.interfaces])
+
+        stops = sorted([name for name in oldcontainers
+                        if not name in newcontainers or restart(name)])
+
+        starts = sorted([name for name in newcontainers
+                         if not name in oldcontainers or name in stops])
+
+        print('Apply: stop %d containers, start %d containers, ' \
+              'down %d bridges, up %d bridges, %d containers unchanged.' % \
+              (len(stops), len(starts), len(bridgesdown), len(bridgesup),
+               len(newcontainers) - len(starts)))
+
+        self._check_reserved([newcontainers[name] for name in starts])
+
+        # kernel parameters are idempotent, reapply the changed ones
+        oldkernelparameters = oldplandoc.kernelparameters(hostname)
+
+        for kernelparamname, kernelparamval in newplandoc.kernelparameters(hostname).items():
+            if oldkernelparameters.get(kernelparamname) != kernelparamval:
+                os.system('sysctl %s=%s' % (kernelparamname, kernelparamval))
+
+        for name in stops:
+            command = 'lxc-stop -n %s -k &> /dev/null' % name
+            print(command)
+            os.system(command)
+
+        self._platform.bridgesdown([(name, oldbridges[name].addifs)
+                                    for name in bridgesdown])
+
+        if stops:
+            self._retire(*[oldcontainers[name].lxc_directory for name in stops])
+
+        if writehosts:
+            hostsentries = lambda containers: \
+                sorted([(c.hosts_entries_ipv4, c.hosts_entries_ipv6)
+                        for c in containers.values()])
+
+            if hostsentries(oldcontainers) != hostsentries(newcontainers):
+                self._writehosts(lxcrootdir, list(newcontainers.values()))
+
+        for name in bridgesup:
+            print('Bringing up bridge: %s' % name)
+
+        self._platform.bridgesup(
+            [(name,
+              newbridges[name].addifs,
+              [address for address in (newbridges[name].ipv4, newbridges[name].ipv6)
+               if not address is None])
+             for name in bridgesup],
+            enablemulticastsnooping=True)
+
+        if not starts:
+            return {}
+
+        startcontainers = [newcontainers[name] for name in starts]
+
+        if not os.path.isdir(lxcrootdir):
+            os.makedirs(lxcrootdir)
+
+        self._writecontainerfiles(lxcrootdir, startcontainers)
+
+        return self._startnodes(startcontainers, concurrency, timeout)
+
+
+    def _bridgekey(self, bridge):
+        return (bridge.name, bridge.ipv4, bridge.ipv6, sorted(bridge.addifs))
+
+
+    def _writecontainerfiles(self, lxcrootdir, containers):
         for container in containers:
             lxc_directory = container.lxc_directory
 
@@ -188,32 +383,54 @@ class LXCManagerImpl(object):
                              stat.S_IXGRP | stat.S_IROTH | \
                              stat.S_IXOTH)
 
-        if dryrun:
-            print('dryrun')
-        else:
-            self._startnodes(containers)
 
+    def _retire(self, *directories):
+        '''
+        Rename each of directories to a sibling directory and delete
+        them, along with any left behind by earlier runs, in a
+        background process that outlives this one. A directory that
+        cannot be renamed, such as a mountpoint, is emptied in place.
+        '''
+        retired = []
 
-    def stop(self, plandoc):
-        hostname = self._platform.hostname()
+        for directory in directories:
+            retired.extend(glob.glob(directory + '.retired.*'))
 
-        noderoot = plandoc.lxc_root_directory(hostname)
+            if os.path.exists(directory):
+                retiredir = '%s.retired.%d.%d' % (directory, os.getpid(), time.time())
 
-        for container in plandoc.containers(hostname):
-            command = 'lxc-stop -n %s -k &> /dev/null' % container.lxc_name
-            print(command)
-            os.system(command)
+                print('Removing "%s" directory.' % directory)
 
-        for _, bridge in plandoc.bridges(hostname).items():
-            if not bridge.persistent:
-                print('Bringing down bridge: %s' % bridge.devicename)
-                self._platform.bridgedown(bridge.devicename, bridge.addifs)
+                try:
+                    os.rename(directory, retiredir)
+
+                    retired.append(retiredir)
+                except OSError as e:
+                    if not e.errno in (errno.EBUSY, errno.EXDEV):
+                        raise
+
+                    self._empty(directory)
 
-        os.remove(plandoc.planfile())
+        if retired:
+            subprocess.Popen(['rm', '-rf'] + retired,
+                             stdin=subprocess.DEVNULL,
+                             stdout=subprocess.DEVNULL,
+                             stderr=subprocess.DEVNULL,
+                             start_new_session=True)
+
+
+    def _empty(self, directory):
+        for subentry in os.listdir(directory):
+            entry = os.path.join(directory, subentry)
+            if os.path.isdir(entry) and not os.path.islink(entry):
+                shutil.rmtree(entry)
+            else:
+                os.remove(entry)
 
 
     def _makedirs(self, noderoot):
-        os.makedirs(noderoot)
+        # noderoot is left in place when it is a mountpoint
+        os.makedirs(noderoot, exist_ok=True)
 
         vardir = os.path.join(noderoot, 'var')
         os.makedirs(vardir)
@@ -225,159 +442,105 @@ class LXCManagerImpl(object):
         os.makedirs(mntdir)
 
 
-    def _startnodes(self, containers):
-        for container in containers:
-            command = 'lxc-execute -f %s/lxc.container.conf  ' \
-                      '-n %s '                     \
-                      '-o %s/log '                 \
-                      '-- %s/init.sh '             \
-                      '2> /dev/null &' %             \
-                      (container.lxc_directory,
-                       container.lxc_name,
-                       container.lxc_directory,
-                       container.lxc_directory)
-
-            pid, sp = etce.utils.daemonize_command(command)
-
-            if pid == 0:
-                # child
-                sp.wait()
-                sys.exit(0)
-
-            time.sleep(0.1)
-
-
-    def _waitstart(self, nodecount, lxcroot):
-        numstarted = 0
-        for i in range(10):
-            command = 'lxc-ls -1 --active'
-            numstarted = len(self._platform.runcommand(command))
-            print('Waiting for lxc containers: %d of %d are running.' % \
-                  (numstarted, nodecount))
-
-            if numstarted == nodecount:
-                break
-
-            time.sleep(1)
-
-        print('Continuing with %d of %d running lxc containers.' % \
-              (numstarted, nodecount))
-
-
-    def _writehosts(self, containers):
-        opentag = '#### Start auto-generated ETCE control mappings\n'
-        closetag = '#### Stop auto-generated ETCE control mappings\n'
-        etcehostlines = []
-        searchstate = 0
-        for line in open('/etc/hosts', 'r'):
-            if searchstate == 0:
-                if line.startswith(opentag):
-                    searchstate = 1
-                else:
-                    etcehostlines.append(line)
-            elif searchstate == 1:
-                if line.startswith(closetag):
-                    searchstate == 2
-            else:
-                etcehostlines.append(line)
-
-        # strip off trailing white spaces lines at end of file
-        etcehostlines.reverse()
-
-        for i, line in enumerate(etcehostlines):
-            if len(line.strip()) > 0:
-                etcehostlines = etcehostlines[i:]
-                break
-
-        etcehostlines.reverse()
-
-        entry_collisions = self._check_for_collisions(etcehostlines, containers)
-
-        if entry_collisions:
-            message = 'ERROR: Cannot write hosts file for hosts or ' \
-                'addresses "%s", already present in /etc/hosts. Quitting.' \
-                % ','.join(entry_collisions)
-
-            raise LXCError(message)
-
+    def _startnodes(self, containers, concurrency, timeout):
+        '''
+        Launch containers, at most concurrency at a time, waiting for
+        each to reach the RUNNING state before launching the next in
+        its slot. Returns a dictionary of container name to start
+        latency in seconds, None where the container is not running.
+        '''
+        print('Starting %d containers, %d at a time.' % (len(containers), concurrency))
 
-        with open('/etc/hosts', 'w') as ofd:
-            for line in etcehostlines:
-                ofd.write(line)
+        starttime = time.time()
 
-            ofd.write('\n')
+        with LXCStateMonitor([container.lxc_name for container in containers]) as monitor:
+            def startnode(container):
+                return self._startnode(container, monitor, timeout)
 
-            ofd.write(opentag)
+            with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+                latencies = dict(executor.map(startnode, containers))
 
-            # ipv4
-            ipv4_entries = []
+            # readiness barrier, all containers launched, confirm
+            # none have stopped since
+            for name in monitor.wait_all(0):
+                latencies[name] = None
 
-            for container in containers:
-                for hostentry, hostaddr in container.hosts_entries_ipv4:
-                    ipv4_entries.append((hostentry, hostaddr))
+        not_running = sorted([name for name, latency in latencies.items() if latency is None])
 
-            for hostentry, hostaddr in sorted(ipv4_entries):
-                ofd.write('%s %s\n' % (hostaddr, hostentry))
+        started = sorted([latency for latency in latencies.values() if not latency is None])
 
-            #ipv6
-            ipv6_entries = []
+        if started:
+            print('Started %d of %d containers in %0.1f seconds ' \
+                  '(start latency min %0.2f, median %0.2f, max %0.2f seconds).' % \
+                  (len(started),
+                   len(containers),
+                   time.time() - starttime,
+                   started[0],
+                   started[len(started)//2],
+                   started[-1]))
 
-            for container in containers:
-                for hostentry, hostaddr in container.hosts_entries_ipv6:
-                    ipv6_entries.append((hostaddr, hostentry))
+        if not_running:
+            print('Containers not running: %s' % ', '.join(not_running))
 
-            for hostentry, hostaddr in sorted(ipv6_entries):
-                ofd.write('%s %s\n' % (hostaddr, hostentry))
+        return latencies
 
-            ofd.write(closetag)
 
+    def _startnode(self, container, monitor, timeout):
+        command = ['lxc-execute',
+                   '-f', '%s/lxc.container.conf' % container.lxc_directory,
+                   '-n', container.lxc_name,
+                   '-o', '%s/log' % container.lxc_directory,
+                   '--', '%s/init.sh' % container.lxc_directory]
 
-    def _check_for_collisions(self, etcehostlines, containers):
-        """
-        Make sure new addresses do not overwrite existing ones
-        """
-        ipv4re = re.compile(r'(?P<address>[\d\.]+)\s+(?P<aliases>[\w\s\-]+)(#?.*)')
+        starttime = time.time()
 
-        ipv6re = re.compile(r'(?P<address>[\da-f\:]+)\s+(?P<aliases>[\w\s\-]+)(#?.*)')
+        # lxc-execute runs for the life of the container, detach it
+        # into its own session so it outlives this process
+        process = subprocess.Popen(command,
+                                   stdin=subprocess.DEVNULL,
+                                   stdout=subprocess.DEVNULL,
+                                   stderr=subprocess.DEVNULL,
+                                   start_new_session=True)
 
-        current_ips = set([])
+        deadline = starttime + timeout
 
-        current_aliases = set([])
+        while True:
+            # wait in short slices to also watch lxc-execute, which
+            # may die before the container emits any state
+            if monitor.wait_running(container.lxc_name, min(0.5, deadline - time.time())):
+                return (container.lxc_name, time.time() - starttime)
 
-        for line in etcehostlines:
-            m4 = ipv4re.match(line)
+            # lxc-execute exiting means the container failed or finished
+            if not process.poll() is None or \
+               monitor.state(container.lxc_name) == 'STOPPED' or \
+               time.time() >= deadline:
+                return (container.lxc_name, None)
 
-            m6 = ipv6re.match(line)
 
-            if m4:
-                current_ips.add(m4.group('address'))
-
-                current_aliases.update(m4.group('aliases').split())
-
-            elif m6:
-                current_ips.add(m6.group('address'))
-
-                current_aliases.update(
-                    [alias.strip() for alias in m6.group('aliases').split()])
-
-        new_ips = []
-
-        new_aliases = []
+    def _writehosts(self, lxcrootdir, containers):
+        '''
+        Write the hosts entries of containers to the /etc/hosts block
+        named for the field's lxcrootdir, replacing the block's previous
+        entries and leaving other fields' blocks in place. containers
+        may be empty to remove the block.
+        '''
+        entries = []
 
         for container in containers:
-            for alias,ip in container.hosts_entries_ipv4:
-                new_aliases.append(alias)
-                new_ips.append(ip)
+            for hostentry, hostaddr in container.hosts_entries_ipv4:
+                entries.append((hostaddr, hostentry))
 
-            for alias,ip in container.hosts_entries_ipv6:
-                new_aliases.append(alias)
-                new_ips.append(ip)
+            for hostentry, hostaddr in container.hosts_entries_ipv6:
+                entries.append((hostaddr, hostentry))
 
-        collided_ips = current_ips.intersection(new_ips)
+        entry_collisions = HostsFile.update(lxcrootdir, entries if containers else None)
 
-        collided_aliases = current_aliases.intersection(new_aliases)
+        if entry_collisions:
+            message = 'ERROR: Cannot write hosts file for hosts or ' \
+                'addresses "%s", already present in /etc/hosts. Quitting.' \
+                % ','.join(entry_collisions)
 
-        return list(collided_ips) + list(collided_aliases)
+            raise LXCError(message)
 
 
     def _check_reserved(self, containers):
@@ -42,6 +42,7 @@ import etce.utils
 import etce.xmldoc
 from etce.apprunner import AppRunner
 from etce.config import ConfigDictionary
+from etce.cpuallocator import CPUAllocator, cpulist_str
 from etce.lxcerror import LXCError
 from etce.templateutils import format_string, TemplateError
 
@@ -68,6 +69,19 @@ class ParamConverter(object):
 
         self._lxc_major_version = int(lines[0].decode().split('.')[0])
 
+    # cgroup v1 controller files renamed under cgroup v2
+    cgroup_param_translation_1_to_2 = {
+        'memory.limit_in_bytes': 'memory.max'
+    }
+
+    def cgroup_param_name(self, controllerparam):
+        # lxc.cgroup2 keys need LXC 4 or later and a unified hierarchy
+        if self._lxc_major_version > 3 and os.path.exists('/sys/fs/cgroup/cgroup.controllers'):
+            return 'lxc.cgroup2.%s' % \
+                ParamConverter.cgroup_param_translation_1_to_2.get(controllerparam, controllerparam)
+
+        return 'lxc.cgroup.%s' % controllerparam
+
     def uts_param_name(self):
         if self._lxc_major_version > 2:
             return 'lxc.uts.name'
@@ -717,6 +731,14 @@ class LXCPlanFileDoc(etce.xmldoc.XMLDoc):
 
         hostelems = lxcplanelem.findall('./hosts/host')
 
+        # read configuration once for the whole plan
+        etceconfig = ConfigDictionary()
+
+        default_overlays = etceconfig.asdict()['overlays']
+
+        root_directory = \
+            os.path.join(etceconfig.get('etce', 'WORK_DIRECTORY'), 'lxcroot')
+
         bridges = {}
 
         containers = {}
@@ -755,10 +777,14 @@ class LXCPlanFileDoc(etce.xmldoc.XMLDoc):
 
             params = []
 
-            containerselem = hostelem.findall('./containers')[0]
+            # host CPU pool that container cpus are assigned from
+            cpuallocator = None
 
-            root_directory = \
-                os.path.join(ConfigDictionary().get('etce', 'WORK_DIRECTORY'), 'lxcroot')
+            if 'cpus' in hostelem.attrib:
+                cpuallocator = CPUAllocator(
+                    etce.utils.nodestr_to_nodelist(str(hostelem.attrib['cpus'])))
+
+            containerselem = hostelem.findall('./containers')[0]
 
             rootdirectories[hostname] = root_directory
 
@@ -795,7 +821,7 @@ class LXCPlanFileDoc(etce.xmldoc.XMLDoc):
                     str(containerelem.get('lxc_indices', '')))
 
                 # fetch the overlays, use etce file values as default
-                overlays = ConfigDictionary().asdict()['overlays']
+                overlays = dict(default_overlays)
 
                 for overlayelem in containerelem.findall('./overlays/overlay'):
                     oname = overlayelem.attrib['name']
@@ -853,9 +879,15 @@ class LXCPlanFileDoc(etce.xmldoc.XMLDoc):
                     lxcoverlays.update(
                         {'lxc_directory':os.path.join(root_directory, lxcoverlays['lxc_name'])})
 
+                    cgroupparams = self._cgroup_params(containerelem,
+                                                       lxcoverlays['lxc_name'],
+                                                       hostname,
+                                                       cpuallocator,
+                                                       paramconverter)
+
                     containers[hostname].append(Container(containerelem,
                                                           lxcoverlays,
-                                                          params,
+                                                          params + cgroupparams,
                                                           template,
                                                           bridges[hostname],
                                                           hostname,
@@ -872,6 +904,42 @@ class LXCPlanFileDoc(etce.xmldoc.XMLDoc):
         return (hostnames, kernelparameters, bridges, containers, rootdirectories)
 
 
+    def _cgroup_params(self, containerelem, lxc_name, hostname, cpuallocator, paramconverter):
+        '''
+        Expand the container cpus, numanode and memory attributes into
+        cgroup cpuset and memory parameters, with cores assigned from
+        the host CPU pool.
+        '''
+        cgroupparams = []
+
+        if 'cpus' in containerelem.attrib:
+            if cpuallocator is None:
+                raise LXCError('Container "%s" requests cpus but host "%s" has no ' \
+                               'cpus attribute to assign them from. Quitting.' % \
+                               (lxc_name, hostname))
+
+            numanode = containerelem.attrib.get('numanode', None)
+
+            try:
+                cpus, nodes = cpuallocator.allocate(
+                    int(containerelem.attrib['cpus']),
+                    None if numanode is None else int(numanode))
+            except ValueError as ve:
+                raise LXCError('Container "%s": %s' % (lxc_name, str(ve)))
+
+            cgroupparams.append((paramconverter.cgroup_param_name('cpuset.cpus'),
+                                 cpulist_str(cpus)))
+
+            cgroupparams.append((paramconverter.cgroup_param_name('cpuset.mems'),
+                                 cpulist_str(nodes)))
+
+        if 'memory' in containerelem.attrib:
+            cgroupparams.append((paramconverter.cgroup_param_name('memory.limit_in_bytes'),
+                                 str(containerelem.attrib['memory'])))
+
+        return cgroupparams
+
+
 def main():
     if len(sys.argv) != 2:
         print('usage: lxcplanfiledoc.py lxcplanfile')
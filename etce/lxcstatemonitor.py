@@ -0,0 +1,221 @@
+#
+# Copyright (c) 2026 - Adjacent Link LLC, Bridgewater, New Jersey
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in
+#   the documentation and/or other materials provided with the
+#   distribution.
+# * Neither the name of Adjacent Link LLC nor the names of its
+#   contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+
+import re
+import subprocess
+import threading
+import time
+
+
+class LXCStateMonitor(object):
+    '''
+    Track the state of a set of LXC containers from the event stream
+    of a single lxc-monitor process, instead of polling each container.
+    Events that may have been missed while lxc-monitor was connecting
+    are reconciled by an occasional "lxc-ls --running", only made
+    while some caller is waiting.
+    '''
+
+    RECONCILE_INTERVAL = 2.0
+
+    _statematcher = re.compile(r"'(?P<name>.+)' changed state to \[(?P<state>\w+)\]")
+
+    _exitmatcher = re.compile(r"'(?P<name>.+)' exited with status \[(?P<status>-?\d+)\]")
+
+    def __init__(self, names):
+        self._names = set(names)
+
+        self._states = {}
+
+        self._condition = threading.Condition()
+
+        self._waiters = 0
+
+        self._stopped = False
+
+        self._process = subprocess.Popen(['lxc-monitor', '-n', '.*'],
+                                         stdin=subprocess.DEVNULL,
+                                         stdout=subprocess.PIPE,
+                                         stderr=subprocess.DEVNULL,
+                                         universal_newlines=True)
+
+        self._reader = threading.Thread(target=self._read_events, daemon=True)
+
+        self._reader.start()
+
+        self._reconciler = threading.Thread(target=self._reconcile_loop, daemon=True)
+
+        self._reconciler.start()
+
+        # containers already running before the monitor started
+        self._reconcile()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+
+            self._condition.notify_all()
+
+        if self._process.poll() is None:
+            self._process.terminate()
+
+        self._process.wait()
+
+
+    def state(self, name):
+        with self._condition:
+            return self._states.get(name)
+
+
+    def wait_running(self, name, timeout):
+        '''
+        Wait up to timeout seconds for container name to be RUNNING.
+        Returns True when running, False if the container stopped
+        or the timeout expired.
+        '''
+        deadline = time.time() + timeout
+
+        with self._condition:
+            self._waiters += 1
+
+            try:
+                while True:
+                    state = self._states.get(name)
+
+                    if state == 'RUNNING':
+                        return True
+
+                    if state == 'STOPPED':
+                        return False
+
+                    remaining = deadline - time.time()
+
+                    if remaining <= 0 or self._stopped:
+                        return False
+
+                    self._condition.wait(remaining)
+            finally:
+                self._waiters -= 1
+
+
+    def wait_all(self, timeout):
+        '''
+        Wait up to timeout seconds for all monitored containers to be
+        RUNNING. Returns the sorted names of the containers that are not.
+        '''
+        deadline = time.time() + timeout
+
+        with self._condition:
+            self._waiters += 1
+
+            try:
+                while True:
+                    not_running = [name for name in self._names
+                                   if not self._states.get(name) == 'RUNNING']
+
+                    remaining = deadline - time.time()
+
+                    if not not_running or remaining <= 0 or self._stopped:
+                        return sorted(not_running)
+
+                    self._condition.wait(remaining)
+            finally:
+                self._waiters -= 1
+
+
+    def _update(self, name, state):
+        if not name in self._names:
+            return
+
+        with self._condition:
+            self._states[name] = state
+
+            self._condition.notify_all()
+
+
+    def _read_events(self):
+        for line in self._process.stdout:
+            match = self._statematcher.search(line)
+
+            if match:
+                self._update(match.group('name'), match.group('state'))
+                continue
+
+            match = self._exitmatcher.search(line)
+
+            if match:
+                self._update(match.group('name'), 'STOPPED')
+
+
+    def _reconcile(self):
+        try:
+            output = subprocess.check_output(['lxc-ls', '-1', '--running'],
+                                             stdin=subprocess.DEVNULL,
+                                             stderr=subprocess.DEVNULL,
+                                             universal_newlines=True)
+        except (OSError, subprocess.CalledProcessError):
+            return
+
+        for name in output.split():
+            self._update(name, 'RUNNING')
+
+
+    def _reconcile_loop(self):
+        last_reconcile = time.time()
+
+        while True:
+            with self._condition:
+                # woken by every event, only reconcile once per interval
+                remaining = last_reconcile + LXCStateMonitor.RECONCILE_INTERVAL - time.time()
+
+                if remaining > 0 and not self._stopped:
+                    self._condition.wait(remaining)
+                    continue
+
+                if self._stopped:
+                    return
+
+                waiting = self._waiters > 0
+
+            last_reconcile = time.time()
+
+            if waiting:
+                self._reconcile()
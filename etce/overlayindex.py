@@ -0,0 +1,63 @@
+#
+# Copyright (c) 2026 - Adjacent Link LLC, Bridgewater, New Jersey
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in
+#   the documentation and/or other materials provided with the
+#   distribution.
+# * Neither the name of Adjacent Link LLC nor the names of its
+#   contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+
+from etce.chainmap import ChainMap
+
+
+class OverlayIndex(object):
+    ''' OverlayIndex flattens a sequence of overlay maps, given in
+        precedence order, into a single dict once so that the many
+        overlay views built from it during publishing don't repeat
+        the per layer search and key union. Each view adds a small
+        top layer (reserved overlays for a particular file or
+        host) in front of the flattened layers.
+    '''
+
+    def __init__(self, *layers):
+        self._flat = ChainMap(*layers).flatten()
+
+
+    def __len__(self):
+        return len(self._flat)
+
+
+    def __contains__(self, key):
+        return key in self._flat
+
+
+    def keys(self):
+        return self._flat.keys()
+
+
+    def view(self, top=None):
+        ''' Return a Mapping searching top and then the indexed layers. '''
+        return ChainMap(top if top is not None else {}, self._flat)
@@ -118,6 +118,12 @@ class Platform:
     def isdeviceup(self, device):
         return self._impl.isdeviceup(device)
 
+    def waitfordevices(self, devices, timeout):
+        return self._impl.waitfordevices(devices, timeout)
+
+    def waitforsockets(self, addresses, timeout):
+        return self._impl.waitforsockets(addresses, timeout)
+
     def networkinterfaceup(self, interface):
         self._impl.networkinterfaceup(interface)
 
@@ -130,6 +136,12 @@ class Platform:
     def bridgedown(self, bridgename, addifs):
         self._impl.bridgedown(bridgename, addifs)
 
+    def bridgesup(self, bridges, enablemulticastsnooping=True):
+        self._impl.bridgesup(bridges, enablemulticastsnooping)
+
+    def bridgesdown(self, bridges):
+        self._impl.bridgesdown(bridges)
+
     def hostname(self):
         return self._impl.hostname()
 
@@ -139,6 +151,9 @@ class Platform:
     def hostnames_has_local_address(self, hostnames):
         return self._impl.hostnames_has_local_address(hostnames)
 
+    def getlocaladdresses(self):
+        return self._impl.getlocaladdresses()
+
     def hostid(self):
         return self._impl.hostid()
 
@@ -32,11 +32,15 @@
 
 from __future__ import absolute_import, division, print_function
 
+import errno
 import os
 import re
+import selectors
 import shlex
 import shutil
+import socket
 import subprocess
+import time
 
 
 class PlatformImpl:
@@ -79,3 +83,123 @@ class PlatformImpl:
         if subdir in os.listdir(os.getcwd()):
             print('removing subdirectory "%s" from "%s"' % (subdir, os.getcwd()))
             shutil.rmtree(subdir)
+
+
+    def waitfordevices(self, devices, timeout):
+        '''
+        Wait up to timeout seconds for the named network devices to
+        be up. Returns the devices still not up, an empty list when
+        all came up. This generic version polls isdeviceup with a
+        sub-second backoff.
+        '''
+        deadline = time.time() + timeout
+
+        pending = list(devices)
+
+        delay = 0.05
+
+        while True:
+            pending = [ device for device in pending if not self.isdeviceup(device) ]
+
+            remaining = deadline - time.time()
+
+            if not pending or remaining <= 0:
+                return pending
+
+            time.sleep(min(delay, remaining))
+
+            delay = min(delay * 2, 1.0)
+
+
+    def waitforsockets(self, addresses, timeout):
+        '''
+        Wait up to timeout seconds for a TCP connect to succeed to
+        each (host, port) in addresses. Connects to all pending
+        addresses are made concurrently, without blocking, and
+        retried with a backoff from 50ms to 1s. Returns the
+        addresses not connected, an empty list when all were.
+        '''
+        deadline = time.time() + timeout
+
+        pending = list(addresses)
+
+        delay = 0.05
+
+        while True:
+            roundstart = time.time()
+
+            pending = self._connectall(pending, min(delay, deadline - roundstart))
+
+            remaining = deadline - time.time()
+
+            if not pending or remaining <= 0:
+                return pending
+
+            # refused connects fail at once, wait out the round
+            time.sleep(max(min(roundstart + delay - time.time(), remaining), 0))
+
+            delay = min(delay * 2, 1.0)
+
+
+    def _connectall(self, addresses, timeout):
+        '''
+        Start a non-blocking connect to every address and wait up to
+        timeout seconds (the longer of timeout and 10ms) for them to
+        complete. Returns the addresses that did not connect.
+        '''
+        starttime = time.time()
+
+        failed = []
+
+        selector = selectors.DefaultSelector()
+
+        try:
+            for address in addresses:
+                try:
+                    family, socktype, proto, _, sockaddr = \
+                        socket.getaddrinfo(address[0], address[1], type=socket.SOCK_STREAM)[0]
+
+                    sock = socket.socket(family, socktype, proto)
+                except (OSError, socket.gaierror):
+                    failed.append(address)
+                    continue
+
+                sock.setblocking(False)
+
+                result = sock.connect_ex(sockaddr)
+
+                if result == 0:
+                    sock.close()
+                elif result in (errno.EINPROGRESS, errno.EAGAIN):
+                    selector.register(sock, selectors.EVENT_WRITE, address)
+                else:
+                    sock.close()
+                    failed.append(address)
+
+            while selector.get_map():
+                remaining = max(timeout, 0.01) - (time.time() - starttime)
+
+                events = selector.select(remaining) if remaining > 0 else []
+
+                if not events:
+                    break
+
+                for key, _ in events:
+                    selector.unregister(key.fileobj)
+
+                    if key.fileobj.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR):
+                        failed.append(key.data)
+
+                    key.fileobj.close()
+
+            # connects still in progress count as failed this round
+            for key in list(selector.get_map().values()):
+                selector.unregister(key.fileobj)
+
+                key.fileobj.close()
+
+                failed.append(key.data)
+        finally:
+            selector.close()
+
+        return [ address for address in addresses if address in failed ]
@@ -39,10 +39,10 @@ import sys
 import traceback
 
 import etce.utils
-from etce.chainmap import ChainMap
+from etce.overlayindex import OverlayIndex
 from etce.testfiledoc import TestFileDoc
 from etce.testdirectoryentry import TestDirectoryEntry
-from etce.templateutils import format_file
+from etce.templateutils import format_file, get_files_overlays, is_template_file
 from etce.testdirectory import TestDirectory
 from etce.config import ConfigDictionary
 
@@ -58,6 +58,8 @@ class Publisher(object):
 
         self._config = ConfigDictionary()
 
+        self._placement = self._config.get('etce', 'PUBLISH_FILE_PLACEMENT')
+
 
     def merge_with_base(self, mergedir, absbasedir_override=None, extrafiles=[]):
         '''
@@ -123,7 +125,7 @@ class Publisher(object):
             if entry.sub_path == TestDirectory.TESTFILENAME:
                 self._testdoc.rewrite_without_base_directory(dstfile)
             else:
-                shutil.copyfile(srcfile, dstfile)
+                etce.utils.place_file(srcfile, dstfile, self._placement)
 
         self._move_extra_files(extrafiles, mergedir)
 
@@ -203,25 +205,9 @@ class Publisher(object):
             publish combines the files from the test directory and the (optional)
             base directory to the destination.
         '''
-        srcdirs = [self._test_directory]
-
-        if absbasedir_override:
-            srcdirs.insert(0, absbasedir_override)
-        elif self._testdoc.has_base_directory:
-            # test.xml file base directory is permitted to be relative or absolute
-            if self._testdoc.base_directory[0] == os.path.sep:
-                srcdirs.insert(0, self._testdoc.base_directory)
-            else:
-                srcdirs.insert(0, os.path.join(self._test_directory, self._testdoc.base_directory))
-
         templates = self._testdoc.templates
 
-        subdirectory_map = {}
-
-        for srcdir in srcdirs:
-            subdirectory_map.update(self._build_subdirectory_map(srcdir))
-
-        subdirectory_map = self._prune_unused_template_directories(subdirectory_map)
+        subdirectory_map = self._build_publish_map(absbasedir_override)
 
         etce_config_overlays, env_overlays = self._get_host_and_env_overlays()
 
@@ -262,6 +248,78 @@ class Publisher(object):
         self._move_extra_files(extrafiles, publishdir)
 
 
+    def check_overlays(self,
+                       logdir=None,
+                       absbasedir_override=None,
+                       runtime_overlays={},
+                       max_workers=None):
+        '''Check, without publishing, that every overlay referenced by the
+           files publish would render is available to it. The overlay
+           names each file references are found by parsing (not rendering)
+           the file, in parallel. Files are checked against the overlays of
+           every template index they are instantiated for.
+
+           Returns a sorted list of (published file name, missing overlay
+           names) pairs, empty when nothing is missing.
+        '''
+        templates = self._testdoc.templates
+
+        subdirectory_map = self._build_publish_map(absbasedir_override)
+
+        skipfiles = (TestDirectory.TESTFILENAME,
+                     TestDirectory.CONFIGFILENAME,
+                     TestDirectory.HOSTFILENAME)
+
+        omitdirs = (TestDirectory.DOCSUBDIRNAME,)
+
+        file_overlays = \
+            get_files_overlays([entry.full_name for relname, entry in subdirectory_map.items()
+                                if not relname in skipfiles and not entry.root_sub_entry in omitdirs],
+                               max_workers)
+
+        etce_config_overlays, env_overlays = self._get_host_and_env_overlays()
+
+        testfile_global_overlays = self._testdoc.global_overlays(subdirectory_map)
+
+        missing = []
+
+        for template in templates:
+            missing.extend(template.missing_overlays(subdirectory_map,
+                                                     file_overlays,
+                                                     logdir,
+                                                     runtime_overlays,
+                                                     env_overlays,
+                                                     etce_config_overlays))
+
+        for template in templates:
+            subdirectory_map = template.prune(subdirectory_map)
+
+        available = set(self._testdoc.reserved_overlays)
+
+        for some_overlays in [runtime_overlays,
+                              env_overlays,
+                              testfile_global_overlays,
+                              etce_config_overlays]:
+            available.update(some_overlays)
+
+        for relname, entry in subdirectory_map.items():
+            if relname in skipfiles or entry.root_sub_entry in omitdirs:
+                continue
+
+            missing_names = file_overlays[entry.full_name].difference(available)
+
+            if entry.root_sub_entry_is_dir:
+                missing_names = missing_names.difference(['etce_hostname'])
+
+                if logdir:
+                    missing_names = missing_names.difference(['etce_log_path'])
+
+            if missing_names:
+                missing.append((relname, missing_names))
+
+        return sorted(missing)
+
+
     def _get_host_and_env_overlays(self):
         # Assemble overlays from
         # 1. etce.conf
@@ -319,13 +377,26 @@ class Publisher(object):
 
         omitdirs = (TestDirectory.DOCSUBDIRNAME,)
 
+        # for non-template file, overlays maps are searched in precedence:
+        #
+        # 1. reserved overlays
+        # 2. runtime overlays (passed in by user or calling function)
+        # 3. overlays set by environment variable
+        # 4. overlays set in the test.xml file that apply to all files (at
+        #    the top level)
+        # 5. overlays set in the etce.conf "overlays" section - default
+        #    values
+        #
+        # 2-5 are the same for every file, flatten them once.
+        overlay_index = OverlayIndex(runtime_overlays,
+                                     env_overlays,
+                                     testfile_global_overlays,
+                                     etce_config_overlays)
+
         for relname, entry in subdirectory_map.items():
             if entry.root_sub_entry in omitdirs:
                 continue
 
-            # full path to the first level entry
-            first_level_entry_abs = entry.root_sub_entry_absolute
-
             reserved_overlays = copy.copy(reserved_overlays_common)
 
             # first_level_entry is a nodename if it is a directory
@@ -335,20 +406,7 @@ class Publisher(object):
                 if logdir:
                     reserved_overlays['etce_log_path'] = os.path.join(logdir, entry.root_sub_entry)
 
-            # for non-template file, overlays maps are searched in precedence:
-            #
-            # 1. reserved overlays
-            # 2. runtime overlays (passed in by user or calling function)
-            # 3. overlays set by environment variable
-            # 4. overlays set in the test.xml file that apply to all files (at
-            #    the top level)
-            # 5. overlays set in the etce.conf "overlays" section - default
-            #    values
-            overlays = ChainMap(reserved_overlays,
-                                runtime_overlays,
-                                env_overlays,
-                                testfile_global_overlays,
-                                etce_config_overlays)
+            overlays = overlay_index.view(reserved_overlays)
 
             fulldstfile = os.path.join(publishdir, relname)
 
@@ -359,8 +417,9 @@ class Publisher(object):
 
             if relname == TestDirectory.TESTFILENAME:
                 self._testdoc.rewrite_without_overlays_and_templates(fulldstfile)
-            elif relname in skipfiles:
-                shutil.copyfile(entry.full_name, fulldstfile)
+            elif relname in skipfiles or not is_template_file(entry.full_name):
+                # files without template markup render to themselves
+                etce.utils.place_file(entry.full_name, fulldstfile, self._placement)
             else:
                 format_file(entry.full_name, fulldstfile, overlays)
 
@@ -393,6 +452,26 @@ class Publisher(object):
                 subdirectory_map = template.prune(subdirectory_map)
 
 
+    def _build_publish_map(self, absbasedir_override):
+        srcdirs = [self._test_directory]
+
+        if absbasedir_override:
+            srcdirs.insert(0, absbasedir_override)
+        elif self._testdoc.has_base_directory:
+            # test.xml file base directory is permitted to be relative or absolute
+            if self._testdoc.base_directory[0] == os.path.sep:
+                srcdirs.insert(0, self._testdoc.base_directory)
+            else:
+                srcdirs.insert(0, os.path.join(self._test_directory, self._testdoc.base_directory))
+
+        subdirectory_map = {}
+
+        for srcdir in srcdirs:
+            subdirectory_map.update(self._build_subdirectory_map(srcdir))
+
+        return self._prune_unused_template_directories(subdirectory_map)
+
+
     def _get_subfiles(self, directory):
         files = []
 
@@ -38,6 +38,7 @@ except:
     from builtins import input as raw_input
 
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 import errno
 import getpass
 import os
@@ -250,6 +251,12 @@ class SSHClient(etce.fieldclient.FieldClient):
 
         self._execute_threads = []
 
+        # local addresses and host name resolutions for sourceisdestination,
+        # computed once and reused by every put and collect
+        self._local_addresses = None
+
+        self._host_addresses = {}
+
         # ssh authentication is revised (5/7/2019):
         #
         # As tested against paramiko 1.16
@@ -419,12 +426,44 @@ class SSHClient(etce.fieldclient.FieldClient):
 
     def sourceisdestination(self, host, srcfilename, dstfilename):
         if srcfilename == dstfilename:
-            p = Platform()
-            if p.hostname_has_local_address(host):
+            if self._islocalhost(host):
                 return True
         return False
 
 
+    def _islocalhost(self, host):
+        if self._local_addresses is None:
+            try:
+                self._local_addresses = set(Platform().getlocaladdresses())
+            except:
+                self._local_addresses = set()
+
+        self._resolvehosts([host])
+
+        return self._host_addresses[host] in self._local_addresses
+
+
+    def _resolvehosts(self, hosts):
+        '''
+        Resolve the hosts not already resolved, concurrently. Hosts
+        that don't resolve are recorded as None.
+        '''
+        unresolved = [ host for host in set(hosts) if not host in self._host_addresses ]
+
+        if not unresolved:
+            return
+
+        def resolve(host):
+            try:
+                return socket.gethostbyname(host)
+            except:
+                return None
+
+        with ThreadPoolExecutor(max_workers=min(len(unresolved), 32)) as executor:
+            for host, address in zip(unresolved, executor.map(resolve, unresolved)):
+                self._host_addresses[host] = address
+
+
     def put(self,
             localsrc,
             remotedst,
@@ -469,6 +508,8 @@ class SSHClient(etce.fieldclient.FieldClient):
                 tmpsubdir = ''
             absdst = os.path.join(etcedir, tmpsubdir, srcbase)
             dsthosts = []
+            if abssrc == absdst:
+                self._resolvehosts(hosts)
             # only move when not same host and same directory
             for host in hosts:
                 if self.sourceisdestination(host, abssrc, absdst):
@@ -599,6 +640,9 @@ class SSHClient(etce.fieldclient.FieldClient):
             os.chdir(cwd)
             absdst = os.path.join(absroot, os.path.basename(remotesubdir))
 
+            if abssrc == absdst:
+                self._resolvehosts(hosts)
+
             for host in hosts:
                 if self.sourceisdestination(host, abssrc, absdst):
                     print('   Skipping host "%s". Source and destination are the same.' % host)
@@ -45,7 +45,7 @@ class StepsFileDoc(etce.xmldoc.XMLDoc):
     to access step names and wrapper names in each step.
     """
 
-    WrapperEntry = namedtuple('WrapperEntry', ['name', 'decorator'])
+    WrapperEntry = namedtuple('WrapperEntry', ['name', 'decorator', 'after'])
 
     def __init__(self, stepsfile):
         etce.xmldoc.XMLDoc.__init__(self,
@@ -56,7 +56,8 @@ class StepsFileDoc(etce.xmldoc.XMLDoc):
         self._packageprefixes, \
         self._steplist, \
         self._filterdict, \
-        self._wrapperlist = self._parsesteps(stepsfile)
+        self._wrapperlist, \
+        self._concurrencylist = self._parsesteps(stepsfile)
 
 
     def getsteps(self, runfromstep=None, runtostep=None, filtersteps=[]):
@@ -102,6 +103,17 @@ class StepsFileDoc(etce.xmldoc.XMLDoc):
         return None
 
 
+    def getconcurrency(self, stepname):
+        '''
+        The number of wrappers in stepname that may run at the same
+        time, 1 (one after another) unless the step sets concurrency.
+        '''
+        if stepname in self._steplist:
+            return self._concurrencylist[self._steplist.index(stepname)]
+
+        return 1
+
+
     def getpackageprefixes(self):
         return tuple(self._packageprefixes)
 
@@ -119,6 +131,8 @@ class StepsFileDoc(etce.xmldoc.XMLDoc):
 
         wrapperlist = []
 
+        concurrencylist = []
+
         for stepelem in stepselem.findall('./step'):
             stepname = stepelem.attrib['name']
 
@@ -137,9 +151,24 @@ class StepsFileDoc(etce.xmldoc.XMLDoc):
                 if child.tag is etree.Comment:
                     continue
 
+                # wrappers this one waits for when the step runs
+                # wrappers concurrently, must be listed before it
+                after = tuple(child.attrib.get('after', '').replace(',', ' ').split())
+
+                earlier = [entry.name for entry, _, _ in stepwrappers]
+
+                for name in after:
+                    if not name in earlier:
+                        errstr = \
+                            'Wrapper "%s" in step "%s" is after "%s", which is not ' \
+                            'listed before it in the step. Quitting.' % \
+                            (child.attrib['wrapper'], stepname, name)
+                        raise RuntimeError(errstr)
+
                 stepwrappers.append(
                     (StepsFileDoc.WrapperEntry(name=child.attrib['wrapper'],
-                                               decorator=None),
+                                               decorator=None,
+                                               after=after),
                      child.tag,
                      argdict))
 
@@ -156,4 +185,6 @@ class StepsFileDoc(etce.xmldoc.XMLDoc):
 
             wrapperlist.append(tuple(stepwrappers))
 
-        return (packageprefixes, steplist, filterdict, wrapperlist)
+            concurrencylist.append(int(stepelem.attrib.get('concurrency', 1)))
+
+        return (packageprefixes, steplist, filterdict, wrapperlist, concurrencylist)
@@ -0,0 +1,338 @@
+#
+# Copyright (c) 2026 - Adjacent Link LLC, Bridgewater, New Jersey
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in
+#   the documentation and/or other materials provided with the
+#   distribution.
+# * Neither the name of Adjacent Link LLC nor the names of its
+#   contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+
+from __future__ import absolute_import, division, print_function
+
+import errno
+import json
+import os
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+
+import etce.timeutils
+
+
+class Supervisor(object):
+    '''
+    A per node process that launches the daemons wrappers start and
+    tracks them as its own children, so their state, exit codes and
+    resource usage are known without pidfiles or ps, and all of them
+    can be stopped with one request.
+
+    Requests arrive as one JSON object per line on a unix socket,
+    {"request": name, "args": {...}}, and each is answered with one
+    JSON line, {"result": ...} or {"error": message}. Abstract sockets
+    have no file permissions, so only connections from the
+    supervisor's own user, or root, are served.
+    '''
+
+    # seconds shutdown waits for processes to exit before SIGKILL
+    SHUTDOWN_GRACE = 5.0
+
+    def __init__(self, address):
+        self._address = address
+
+        self._processes = []
+
+        self._lock = threading.Lock()
+
+        self._shutdown = threading.Event()
+
+
+    def serve(self):
+        # daemons were started with umask 0 and / as the working directory
+        os.umask(0)
+
+        os.chdir('/')
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        sock.bind(self._address)
+
+        sock.listen(16)
+
+        sock.settimeout(0.1)
+
+        try:
+            while not self._shutdown.is_set():
+                try:
+                    conn, _ = sock.accept()
+                except socket.timeout:
+                    continue
+
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        finally:
+            sock.close()
+
+
+    def _handle(self, conn):
+        with conn, conn.makefile('rw') as connf:
+            credentials = conn.getsockopt(socket.SOL_SOCKET,
+                                          socket.SO_PEERCRED,
+                                          struct.calcsize('3i'))
+
+            _, uid, _ = struct.unpack('3i', credentials)
+
+            permitted = uid in (0, os.geteuid())
+
+            for line in connf:
+                request = None
+
+                try:
+                    if not permitted:
+                        raise RuntimeError('uid %d is not permitted' % uid)
+
+                    request = json.loads(line)
+
+                    method = getattr(self, '_request_%s' % request['request'])
+
+                    response = {'result':method(**request.get('args', {}))}
+                except Exception as e:
+                    response = {'error':str(e)}
+
+                connf.write(json.dumps(response) + '\n')
+
+                connf.flush()
+
+                # exit only once the shutdown reply is sent
+                if 'result' in response and request['request'] == 'shutdown':
+                    self._shutdown.set()
+
+                    return
+
+
+    def _request_launch(self,
+                        argv,
+                        name=None,
+                        stdout=None,
+                        stderr=None,
+                        starttime=None,
+                        pidfile=None,
+                        pidincrement=0):
+        with self._lock:
+            record = {'id':len(self._processes),
+                      'name':name,
+                      'argv':argv,
+                      'pid':None,
+                      'state':'pending',
+                      'returncode':None,
+                      'launchtime':None,
+                      'exittime':None,
+                      'rusage':None}
+
+            self._processes.append(record)
+
+        threading.Thread(target=self._run,
+                         args=(record, stdout, stderr, starttime, pidfile, pidincrement),
+                         daemon=True).start()
+
+        return record['id']
+
+
+    def _run(self, record, stdout, stderr, starttime, pidfile, pidincrement):
+        # wait until specified time to start
+        if starttime:
+            etce.timeutils.sleep_until(starttime)
+
+        if self._shutdown.is_set() or record['state'] != 'pending':
+            return
+
+        stdoutfd = open(stdout, 'w') if stdout else subprocess.DEVNULL
+
+        stderrfd = stdoutfd if stderr and stderr == stdout else \
+                   open(stderr, 'w') if stderr else subprocess.DEVNULL
+
+        try:
+            process = subprocess.Popen(record['argv'],
+                                       stdin=subprocess.DEVNULL,
+                                       stdout=stdoutfd,
+                                       stderr=stderrfd,
+                                       start_new_session=True)
+        except OSError as e:
+            with self._lock:
+                record['state'] = 'failed'
+
+                record['error'] = str(e)
+
+            return
+        finally:
+            for fd in set([stdoutfd, stderrfd]):
+                if not fd is subprocess.DEVNULL:
+                    fd.close()
+
+        with self._lock:
+            record['pid'] = process.pid
+
+            record['state'] = 'running'
+
+            record['launchtime'] = time.time()
+
+        if pidfile:
+            with open(pidfile, 'w') as pidf:
+                pidf.write(str(process.pid + pidincrement))
+
+        # reap directly to collect resource usage with the exit status
+        _, status, rusage = os.wait4(process.pid, 0)
+
+        returncode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+
+        process.returncode = returncode
+
+        with self._lock:
+            record['state'] = 'exited'
+
+            record['returncode'] = returncode
+
+            record['exittime'] = time.time()
+
+            record['rusage'] = {'utime':rusage.ru_utime,
+                                'stime':rusage.ru_stime,
+                                'maxrss':rusage.ru_maxrss}
+
+
+    def _request_status(self):
+        with self._lock:
+            return [dict(record) for record in self._processes]
+
+
+    def _request_stop(self, name=None, signum=signal.SIGTERM):
+        '''
+        Signal the process group of every running process launched as
+        name, or of every running process when name is None. Groups
+        this process may not signal, those of daemons launched with
+        sudo, are signalled with "sudo -n kill". Returns a dictionary
+        with the pids signalled and a list of {pid, error} for those
+        that could not be.
+        '''
+        signalled = []
+
+        failed = []
+
+        with self._lock:
+            for record in self._processes:
+                if not name is None and record['name'] != name:
+                    continue
+
+                if record['state'] == 'pending':
+                    record['state'] = 'cancelled'
+
+                elif record['state'] == 'running':
+                    error = self._killpg(record['pid'], signum)
+
+                    if error is None:
+                        signalled.append(record['pid'])
+                    else:
+                        failed.append({'pid':record['pid'], 'error':error})
+
+        return {'signalled':signalled, 'failed':failed}
+
+
+    def _killpg(self, pgid, signum):
+        # returns None on success, else the reason for failure
+        try:
+            os.killpg(pgid, signum)
+
+            return None
+        except OSError as e:
+            if e.errno == errno.ESRCH:
+                # exited, but not yet reaped
+                return None
+
+            if e.errno != errno.EPERM or os.geteuid() == 0:
+                return str(e)
+
+        command = ['sudo', '-n', 'kill', '-%d' % signum, '--', '-%d' % pgid]
+
+        try:
+            result = subprocess.run(command,
+                                    stdin=subprocess.DEVNULL,
+                                    stdout=subprocess.PIPE,
+                                    stderr=subprocess.STDOUT)
+        except OSError as e:
+            return '"%s" failed: %s' % (' '.join(command), str(e))
+
+        if result.returncode:
+            return '"%s" failed: %s' % (' '.join(command),
+                                        result.stdout.decode(errors='replace').strip())
+
+        return None
+
+
+    def _request_shutdown(self, signum=signal.SIGTERM):
+        '''
+        Stop every process and SIGKILL any still running after
+        SHUTDOWN_GRACE seconds. The supervisor exits once the reply
+        is sent. Returns the stop result, including failures from the
+        SIGKILL pass.
+        '''
+        result = self._request_stop(None, signum)
+
+        deadline = time.time() + Supervisor.SHUTDOWN_GRACE
+
+        while time.time() < deadline:
+            with self._lock:
+                if not [r for r in self._processes if r['state'] == 'running']:
+                    break
+
+            time.sleep(0.05)
+
+        killresult = self._request_stop(None, signal.SIGKILL)
+
+        failedpids = [failure['pid'] for failure in result['failed']]
+
+        result['failed'].extend([failure for failure in killresult['failed']
+                                 if not failure['pid'] in failedpids])
+
+        return result
+
+
+def main():
+    if len(sys.argv) != 2:
+        print('usage: supervisor.py address', file=sys.stderr)
+        exit(1)
+
+    address = sys.argv[1]
+
+    # abstract socket addresses begin with a null byte
+    if address.startswith('@'):
+        address = '\0' + address[1:]
+
+    Supervisor(address).serve()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+#
+# Copyright (c) 2026 - Adjacent Link LLC, Bridgewater, New Jersey
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in
+#   the documentation and/or other materials provided with the
+#   distribution.
+# * Neither the name of Adjacent Link LLC nor the names of its
+#   contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+
+from __future__ import absolute_import, division, print_function
+
+import hashlib
+import json
+import os
+import shlex
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+from etce.config import ConfigDictionary
+
+
+class SupervisorClient(object):
+    '''
+    Client for the node's etce.supervisor process, started on first
+    use. There is one supervisor per ETCE WORK_DIRECTORY and network
+    namespace (each LXC container node gets its own), reached on an
+    abstract unix socket so no socket file is left behind.
+    '''
+
+    # seconds to wait for a supervisor to start or exit
+    START_TIMEOUT = 5.0
+
+    def __init__(self, address=None):
+        if address is None:
+            workdir = ConfigDictionary().get('etce', 'WORK_DIRECTORY')
+
+            address = '@etce.supervisor.%s' % \
+                hashlib.sha1(os.path.abspath(workdir).encode()).hexdigest()[:16]
+
+        self._address = address
+
+
+    def running(self):
+        try:
+            self._connect().close()
+
+            return True
+        except OSError:
+            return False
+
+
+    def start(self):
+        if self.running():
+            return
+
+        subprocess.Popen([sys.executable, '-m', 'etce.supervisor', self._address],
+                         stdin=subprocess.DEVNULL,
+                         stdout=subprocess.DEVNULL,
+                         stderr=subprocess.DEVNULL,
+                         start_new_session=True)
+
+        deadline = time.time() + SupervisorClient.START_TIMEOUT
+
+        while not self.running():
+            if time.time() > deadline:
+                raise RuntimeError('Supervisor failed to start at "%s". Quitting.' % \
+                                   self._address)
+
+            time.sleep(0.05)
+
+
+    def launch(self,
+               commandstr,
+               name=None,
+               stdout=None,
+               stderr=None,
+               starttime=None,
+               pidfile=None,
+               pidincrement=0):
+        '''
+        Have the supervisor run commandstr, at starttime if given,
+        starting the supervisor if necessary. The supervisor writes
+        the process pid plus pidincrement to pidfile once launched.
+        Returns the supervisor's id for the process.
+        '''
+        self.start()
+
+        return self._request('launch',
+                             argv=shlex.split(commandstr),
+                             name=name,
+                             stdout=self._abspath(stdout),
+                             stderr=self._abspath(stderr),
+                             starttime=starttime,
+                             pidfile=self._abspath(pidfile),
+                             pidincrement=pidincrement)
+
+
+    def status(self):
+        '''
+        Return a list with one dictionary per launched process: id,
+        name, argv, pid, state (pending, running, exited, cancelled
+        or failed), returncode, launchtime, exittime and rusage.
+        '''
+        return self._request('status')
+
+
+    def stop(self, name=None, signum=signal.SIGTERM):
+        '''
+        Signal the supervised processes launched as name, or all of
+        them. Returns a dictionary with the list of pids signalled and
+        a list of {pid, error} for the processes that could not be.
+        '''
+        return self._request('stop', name=name, signum=int(signum))
+
+
+    def shutdown(self, signum=signal.SIGTERM):
+        '''
+        Stop every supervised process and the supervisor, returning
+        the same result as stop. Does nothing when no supervisor is
+        running.
+        '''
+        if not self.running():
+            return {'signalled':[], 'failed':[]}
+
+        result = self._request('shutdown', signum=int(signum))
+
+        # wait for the supervisor to release its address
+        deadline = time.time() + SupervisorClient.START_TIMEOUT
+
+        while self.running() and time.time() < deadline:
+            time.sleep(0.05)
+
+        return result
+
+
+    def _abspath(self, filename):
+        # the supervisor runs from /
+        return os.path.abspath(filename) if filename else filename
+
+
+    def _connect(self):
+        address = self._address
+
+        if address.startswith('@'):
+            address = '\0' + address[1:]
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        try:
+            sock.connect(address)
+        except OSError:
+            sock.close()
+            raise
+
+        return sock
+
+
+    def _request(self, request, **args):
+        with self._connect() as sock, sock.makefile('rw') as sockf:
+            sockf.write(json.dumps({'request':request, 'args':args}) + '\n')
+
+            sockf.flush()
+
+            response = json.loads(sockf.readline())
+
+        if 'error' in response:
+            raise RuntimeError('Supervisor %s request failed: %s' % \
+                               (request, response['error']))
+
+        return response['result']
+
+
+def main():
+    client = SupervisorClient()
+
+    if not client.running():
+        print('No supervisor running.')
+        exit(0)
+
+    for record in client.status():
+        print('%4d %-10s %-8s %-6s %s' % (record['id'],
+                                          record['state'],
+                                          str(record['pid']),
+                                          str(record['returncode']),
+                                          ' '.join(record['argv'])))
+
+
+if __name__ == '__main__':
+    main()
@@ -34,8 +34,10 @@ from __future__ import absolute_import, division, print_function
 
 import os
 
-from etce.templateutils import format_file,format_string
+import etce.utils
+from etce.templateutils import check_reserved_key_clashes,format_file,format_string,find_missing_overlays,is_template_file
 from etce.chainmap import ChainMap
+from etce.overlayindex import OverlayIndex
 from etce.config import ConfigDictionary
 
 
@@ -51,7 +53,11 @@ class TemplateDirectoryBuilder(object):
                  reserved_overlays,
                  testfile_global_overlays,
                  templates_global_overlaylists):
-        template_suffix = ConfigDictionary().get('etce', 'TEMPLATE_DIRECTORY_SUFFIX')
+        config = ConfigDictionary()
+
+        template_suffix = config.get('etce', 'TEMPLATE_DIRECTORY_SUFFIX')
+
+        self._placement = config.get('etce', 'PUBLISH_FILE_PLACEMENT')
 
         self._name = tdbconfig.name
 
@@ -132,6 +138,14 @@ class TemplateDirectoryBuilder(object):
                     runtime_overlays,
                     env_overlays,
                     etce_config_overlays):
+        check_reserved_key_clashes(self._reserved_overlays,
+                                   logdir,
+                                   self._overlay_layers(runtime_overlays,
+                                                        env_overlays,
+                                                        etce_config_overlays),
+                                   self._index_overlaylists(),
+                                   self._indices)
+
         for index in self.indices:
             self._createdir(subdirectory_map,
                             publishdir,
@@ -169,26 +183,13 @@ class TemplateDirectoryBuilder(object):
 
         node_publishdir = os.path.join(publishdir, self._reserved_overlays['etce_hostname'])
 
-        non_reserved_overlays = [runtime_overlays,
-                                 env_overlays,
-                                 self._template_local_overlaylists[index],
-                                 self._template_local_overlays,
-                                 self._templates_global_overlaylists[index],
-                                 self._global_overlays,
-                                 etce_config_overlays]
-
-        other_keys = set([])
-
-        for some_overlays in non_reserved_overlays:
-            other_keys.update(some_overlays)
-
-        key_clashes = other_keys.intersection(set(self._reserved_overlays))
-
-        if key_clashes:
-            raise ValueError('Overlay keys {%s} are reserved. Quitting.' % \
-                             ','.join(map(str, key_clashes)))
-
-        overlays = ChainMap(self._reserved_overlays, *non_reserved_overlays)
+        overlays = OverlayIndex(runtime_overlays,
+                                env_overlays,
+                                self._template_local_overlaylists[index],
+                                self._template_local_overlays,
+                                self._templates_global_overlaylists[index],
+                                self._global_overlays,
+                                etce_config_overlays).view(self._reserved_overlays)
 
         print('Processing template directory "%s" for etce_index=%d ' \
               'and destination=%s' % \
@@ -217,7 +218,57 @@ class TemplateDirectoryBuilder(object):
             if not os.path.exists(dstdir):
                 os.makedirs(dstdir)
 
-            format_file(entry.full_name, dstfile, overlays)
+            if is_template_file(entry.full_name):
+                format_file(entry.full_name, dstfile, overlays)
+            else:
+                etce.utils.place_file(entry.full_name, dstfile, self._placement)
+
+
+    def missing_overlays(self,
+                         subdirectory_map,
+                         file_overlays,
+                         logdir,
+                         runtime_overlays,
+                         env_overlays,
+                         etce_config_overlays):
+        '''
+        Return a list of (published file, missing overlay names) for
+        each file instance this template would publish that references
+        overlays not available for its index. file_overlays maps each
+        template file full name to the overlay names it references.
+        '''
+        templatefiles = []
+
+        for relpath, entry in subdirectory_map.items():
+            pathtoks = relpath.split(os.path.sep)
+
+            if relpath.startswith(self._relative_path + '/') and \
+               pathtoks[0] == self.template_directory_name:
+                templatefiles.append((os.path.join(*pathtoks[1:]),
+                                      file_overlays.get(entry.full_name, frozenset())))
+
+        return find_missing_overlays(templatefiles,
+                                     self._indices,
+                                     self.formatted_hostnames,
+                                     self._reserved_overlays,
+                                     logdir,
+                                     self._overlay_layers(runtime_overlays,
+                                                          env_overlays,
+                                                          etce_config_overlays),
+                                     self._index_overlaylists())
+
+
+    def _overlay_layers(self, runtime_overlays, env_overlays, etce_config_overlays):
+        return [runtime_overlays,
+                env_overlays,
+                self._template_local_overlays,
+                self._global_overlays,
+                etce_config_overlays]
+
+
+    def _index_overlaylists(self):
+        return [self._template_local_overlaylists,
+                self._templates_global_overlaylists]
 
 
     def __str__(self):
@@ -35,7 +35,8 @@ from __future__ import absolute_import, division, print_function
 import os.path
 
 from etce.chainmap import ChainMap
-from etce.templateutils import format_file,format_string
+from etce.overlayindex import OverlayIndex
+from etce.templateutils import check_reserved_key_clashes,format_file,format_string,find_missing_overlays
 
 
 class TemplateFileBuilder(object):
@@ -126,6 +127,14 @@ class TemplateFileBuilder(object):
                              % templatefilenameabs)
         self._absname = templatefilenameabs
 
+        check_reserved_key_clashes(self._reserved_overlays,
+                                   logdir,
+                                   self._overlay_layers(runtime_overlays,
+                                                        env_overlays,
+                                                        etce_config_overlays),
+                                   self._index_overlaylists(),
+                                   self._indices)
+
         for index in self._indices:
             self._createfile(publishdir,
                              logdir,
@@ -163,26 +172,13 @@ class TemplateFileBuilder(object):
                                    self._reserved_overlays['etce_hostname'],
                                    self._output_file_name)
 
-        other_keys = set([])
-
-        non_reserved_overlays = [runtime_overlays,
-                                 env_overlays,
-                                 self._template_local_overlaylists[index],
-                                 self._template_local_overlays,
-                                 self._templates_global_overlaylists[index],
-                                 self._global_overlays,
-                                 etce_config_overlays]
-
-        for some_overlays in non_reserved_overlays:
-            other_keys.update(some_overlays)
-
-        key_clashes = other_keys.intersection(set(self._reserved_overlays.keys()))
-
-        if key_clashes:
-            raise ValueError('Overlay keys {%s} are reserved. Quitting.' % \
-                             ','.join(map(str, key_clashes)))
-
-        overlays = ChainMap(self._reserved_overlays, *non_reserved_overlays)
+        overlays = OverlayIndex(runtime_overlays,
+                                env_overlays,
+                                self._template_local_overlaylists[index],
+                                self._template_local_overlays,
+                                self._templates_global_overlaylists[index],
+                                self._global_overlays,
+                                etce_config_overlays).view(self._reserved_overlays)
 
         # format str can add subdirectories, so make those if necessary
         if not os.path.exists(os.path.dirname(publishfile)):
@@ -194,6 +190,50 @@ class TemplateFileBuilder(object):
         format_file(self._absname, publishfile, overlays)
 
 
+    def missing_overlays(self,
+                         subdirectory_map,
+                         file_overlays,
+                         logdir,
+                         runtime_overlays,
+                         env_overlays,
+                         etce_config_overlays):
+        '''
+        Return a list of (published file, missing overlay names) for
+        each file instance this template would publish that references
+        overlays not available for its index. file_overlays maps each
+        template file full name to the overlay names it references.
+        '''
+        if not self._name in subdirectory_map:
+            return []
+
+        templatefiles = [(self._output_file_name,
+                          file_overlays.get(subdirectory_map[self._name].full_name,
+                                            frozenset()))]
+
+        return find_missing_overlays(templatefiles,
+                                     self._indices,
+                                     self.formatted_hostnames,
+                                     self._reserved_overlays,
+                                     logdir,
+                                     self._overlay_layers(runtime_overlays,
+                                                          env_overlays,
+                                                          etce_config_overlays),
+                                     self._index_overlaylists())
+
+
+    def _overlay_layers(self, runtime_overlays, env_overlays, etce_config_overlays):
+        return [runtime_overlays,
+                env_overlays,
+                self._template_local_overlays,
+                self._global_overlays,
+                etce_config_overlays]
+
+
+    def _index_overlaylists(self):
+        return [self._template_local_overlaylists,
+                self._templates_global_overlaylists]
+
+
     def __str__(self):
         retstr = 'TemplateFileBuilder\n'
         retstr += self.name + '\n'
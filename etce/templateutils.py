@@ -30,37 +30,253 @@
 # POSSIBILITY OF SUCH DAMAGE.
 #
 
+from mako import parsetree
 from mako.exceptions import SyntaxException
+from mako.lexer import Lexer
 from mako.template import Template
-from mako.runtime import Context
-import io
+from concurrent.futures import ProcessPoolExecutor
+import builtins
+import mmap
+import os
+import re
+
+from etce.chainmap import ChainMap
+
 
 class TemplateError(Exception):
     def __init__(self, message):
         Exception.__init__(self, message)
 
 
-class CaptureContext(Context):
-    def __init__(self):
-        self._keys = set([])
-        super(CaptureContext, self).__init__(io.StringIO())
+# Byte patterns that cause Mako to alter the text of a file when rendered:
+# expressions, tags, control lines, comment lines and line continuations.
+# Files matching none of these render to exactly their own content.
+_TEMPLATE_SYNTAX_RE = re.compile(rb'\$\{|</?%|^[ \t]*(?:%|##)|\\\r?\n', re.MULTILINE)
+
+_STRING_TEMPLATE_SYNTAX_RE = re.compile(_TEMPLATE_SYNTAX_RE.pattern.decode(), re.MULTILINE)
+
+# absolute file name -> (st_mtime_ns, st_size, is_template)
+_template_sniff_cache = {}
+
+# template string -> compiled Template, emptied when it reaches
+# _STRING_TEMPLATE_CACHE_SIZE entries
+_string_template_cache = {}
+
+_STRING_TEMPLATE_CACHE_SIZE = 4096
+
+
+def is_template_file(filename):
+    '''
+    Return True if filename contains Mako template syntax and so must
+    be rendered, or False if the file can be placed as is. Results are
+    cached and reused until the file's modification time or size change.
+    '''
+    filename = os.path.abspath(filename)
+
+    st = os.stat(filename)
+
+    cached = _template_sniff_cache.get(filename)
+
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+
+    is_template = False
+
+    if st.st_size:
+        with open(filename, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                is_template = _TEMPLATE_SYNTAX_RE.search(m) is not None
+
+    _template_sniff_cache[filename] = (st.st_mtime_ns, st.st_size, is_template)
+
+    return is_template
+
+
+# Names Mako supplies to every template, never looked up as overlays.
+_MAKO_NAMES = frozenset(['context', 'loop', 'UNDEFINED', 'STOP_RENDERING',
+                         'capture', 'caller', 'self', 'local', 'parent',
+                         'next', 'pageargs'])
+
+_BUILTIN_NAMES = frozenset(dir(builtins))
+
+# absolute file name -> (st_mtime_ns, st_size, overlay names)
+_file_overlays_cache = {}
+
 
-    def get(self, key, default=None):
-        self._keys.update([key])
-        return 40.0
+def _collect_identifiers(node, undeclared, declared):
+    if hasattr(node, 'undeclared_identifiers'):
+        undeclared.update(node.undeclared_identifiers())
 
-    def get_all_keys(self):
-        return self._keys
+        declared.update(node.declared_identifiers())
+
+    if isinstance(node, (parsetree.DefTag, parsetree.BlockTag)) and node.funcname:
+        declared.add(node.funcname)
+
+    for child in node.get_children():
+        _collect_identifiers(child, undeclared, declared)
+
+
+def parse_template_overlays(templatefile):
+    '''
+    Return the overlay names referenced by templatefile, found by
+    walking its Mako parse tree without rendering it. Names declared
+    by the template itself (loop variables, code blocks, defs), Mako
+    runtime names and python builtins are excluded.
+    '''
+    if not is_template_file(templatefile):
+        return frozenset()
+
+    with open(templatefile, 'rb') as f:
+        try:
+            text = f.read().decode('utf-8')
+        except UnicodeDecodeError as ude:
+            raise TemplateError('Template file "%s" is not valid UTF-8 (%s). Quitting.' % \
+                                (templatefile, str(ude)))
+
+    try:
+        node = Lexer(text, filename=templatefile).parse()
+    except SyntaxException as se:
+        raise TemplateError(str(se))
+
+    undeclared = set([])
+
+    declared = set([])
+
+    _collect_identifiers(node, undeclared, declared)
+
+    return frozenset(undeclared - declared - _MAKO_NAMES - _BUILTIN_NAMES)
 
 
 def get_file_overlays(templatefile):
-    t = Template(filename=templatefile)
+    '''
+    Cached version of parse_template_overlays. Cache entries are
+    invalidated by changes to the file's modification time or size.
+    '''
+    templatefile = os.path.abspath(templatefile)
+
+    st = os.stat(templatefile)
+
+    cached = _file_overlays_cache.get(templatefile)
+
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+
+    overlays = parse_template_overlays(templatefile)
+
+    _file_overlays_cache[templatefile] = (st.st_mtime_ns, st.st_size, overlays)
+
+    return overlays
 
-    ctx = CaptureContext()
 
-    t.render_context(ctx)
+def get_files_overlays(templatefiles, max_workers=None):
+    '''
+    Return a dict mapping each of templatefiles to the overlay names it
+    references. Files not already cached are parsed in parallel worker
+    processes.
+    '''
+    templatefiles = set(templatefiles)
 
-    return ctx.get_all_keys()
+    stats = dict([(os.path.abspath(f), os.stat(f)) for f in templatefiles])
+
+    uncached = []
+
+    for templatefile, st in stats.items():
+        cached = _file_overlays_cache.get(templatefile)
+
+        if not (cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size):
+            uncached.append(templatefile)
+
+    if len(uncached) > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            for templatefile, overlays in zip(uncached,
+                                              executor.map(parse_template_overlays, uncached)):
+                st = stats[templatefile]
+
+                _file_overlays_cache[templatefile] = (st.st_mtime_ns, st.st_size, overlays)
+
+    return dict([(f, get_file_overlays(f)) for f in templatefiles])
+
+
+def _reserved_overlay_names(reserved_overlays, logdir):
+    names = set(reserved_overlays)
+
+    names.update(['etce_index', 'etce_hostname'])
+
+    if logdir:
+        names.update(['etce_log_path'])
+
+    return names
+
+
+def check_reserved_key_clashes(reserved_overlays,
+                               logdir,
+                               overlay_layers,
+                               index_overlaylists,
+                               indices):
+    '''
+    Raise ValueError if a name in any of overlay_layers, or in the
+    overlaylists (dicts keyed by index) for any of indices, is a
+    reserved overlay name. The reserved names are the same for every
+    index so the check is made once per template, not once per index.
+    '''
+    reserved_keys = _reserved_overlay_names(reserved_overlays, logdir)
+
+    other_keys = set([])
+
+    for some_overlays in overlay_layers:
+        other_keys.update(some_overlays)
+
+    for index in indices:
+        for overlaylists in index_overlaylists:
+            other_keys.update(overlaylists[index])
+
+    key_clashes = other_keys.intersection(reserved_keys)
+
+    if key_clashes:
+        raise ValueError('Overlay keys {%s} are reserved. Quitting.' % \
+                         ','.join(map(str, key_clashes)))
+
+
+def find_missing_overlays(templatefiles,
+                          indices,
+                          hostnames,
+                          reserved_overlays,
+                          logdir,
+                          overlay_layers,
+                          index_overlaylists):
+    '''
+    Return a list of (published file, missing overlay names) for each
+    of templatefiles, (path below the host directory, referenced
+    overlay names) pairs, published for each index and hostname that
+    references overlays not available to that index.
+    '''
+    available = _reserved_overlay_names(reserved_overlays, logdir)
+
+    for some_overlays in overlay_layers:
+        available.update(some_overlays)
+
+    missing = []
+
+    for index, hostname in zip(indices, hostnames):
+        index_available = available.union(*[ overlaylists[index]
+                                             for overlaylists in index_overlaylists ])
+
+        for subpath, overlays in templatefiles:
+            missing_names = overlays.difference(index_available)
+
+            if missing_names:
+                missing.append((os.path.join(hostname, subpath), missing_names))
+
+    return missing
+
+
+def _render(template, overlays):
+    # unpacking a ChainMap looks up each key through python code, flatten
+    # it to a dict first to keep rendering cost independent of layering
+    if isinstance(overlays, ChainMap):
+        overlays = overlays.flatten()
+
+    return template.render(**overlays)
 
 
 def format_file(srcfile, dstfile, overlays):
@@ -68,7 +284,7 @@ def format_file(srcfile, dstfile, overlays):
         try:
             template = Template(filename=srcfile, strict_undefined=True)
 
-            outf.write(template.render(**overlays))
+            outf.write(_render(template, overlays))
         except NameError as ne:
             message = '%s for template file "%s". Quitting.' % (str(ne), srcfile)
             raise TemplateError(message)
@@ -76,15 +292,35 @@ def format_file(srcfile, dstfile, overlays):
             raise TemplateError(str(se))
 
 
-def format_string(template_string, overlays):
-    try:
+def _compile_string(template_string):
+    template = _string_template_cache.get(template_string)
+
+    if template is None:
+        if len(_string_template_cache) >= _STRING_TEMPLATE_CACHE_SIZE:
+            _string_template_cache.clear()
+
         template = Template(template_string, strict_undefined=True)
 
-        return template.render(**overlays)
+        _string_template_cache[template_string] = template
+
+    return template
+
+
+def format_string(template_string, overlays):
+    '''
+    Render template_string with overlays. Strings containing no template
+    syntax are returned as is and compiled templates are reused across
+    calls.
+    '''
+    if not _STRING_TEMPLATE_SYNTAX_RE.search(template_string):
+        return template_string
+
+    try:
+        return _render(_compile_string(template_string), overlays)
     except NameError as ne:
         message = \
             '%s for template string "%s". Available overlays are {%s}. Quitting.' % \
-            (ne.message, template_string, ','.join(overlays.keys()))
+            (str(ne), template_string, ','.join(overlays.keys()))
         raise TemplateError(message)
     except SyntaxException as se:
         message = 'Syntax error while trying to scan template string "%s". Quitting.' % template_string
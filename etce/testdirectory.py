@@ -38,7 +38,7 @@ from etce.configfiledoc import ConfigFileDoc
 from etce.field import Field
 from etce.testfiledoc import TestFileDoc
 from etce.platform import Platform
-from etce.templateutils import get_file_overlays
+from etce.templateutils import get_files_overlays
 from etce.testdirectoryerror import TestDirectoryError
 
 
@@ -251,7 +251,7 @@ class TestDirectory(object):
 
 
     def _find_overlay_names(self):
-        overlays = set([])
+        filenames_abs = []
 
         search_dirs = [self._rootdir]
 
@@ -266,7 +266,11 @@ class TestDirectory(object):
                     # ignore doc sub directory
                     continue
                 for filename in filenames:
-                    overlays.update(
-                        get_file_overlays(os.path.join(dirname, filename)))
+                    filenames_abs.append(os.path.join(dirname, filename))
+
+        overlays = set([])
+
+        for file_overlays in get_files_overlays(filenames_abs).values():
+            overlays.update(file_overlays)
 
         return tuple(sorted(overlays))
@@ -37,6 +37,12 @@ from etce.publisher import Publisher
 
 
 class TestPrepper(object):
+    @staticmethod
+    def runtime_overlays(testdefdir):
+        '''The overlays supplied when publishing on the field node.'''
+        return {'etce_install_path':testdefdir}
+
+
     def run(self, starttime, templatesubdir, trialsubdir):
         etcedir = ConfigDictionary().get('etce', 'WORK_DIRECTORY')
 
@@ -49,7 +55,7 @@ class TestPrepper(object):
         trialdir = os.path.join(etcedir, trialsubdir)
 
         # instantiate the template files and write overlays
-        runtime_overlays = {'etce_install_path':testdefdir}
+        runtime_overlays = TestPrepper.runtime_overlays(testdefdir)
 
         publisher = Publisher(templatedir)
 
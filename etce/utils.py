@@ -32,14 +32,16 @@
 
 from __future__ import absolute_import, division, print_function
 
+import contextlib
 import datetime
+import errno
+import fcntl
 import os
 import os.path
 import resource
 import shlex
 import shutil
 import subprocess
-import sys
 import tarfile
 import tempfile
 
@@ -48,6 +50,24 @@ import etce.timeutils
 from etce.config import ConfigDictionary
 
 
+@contextlib.contextmanager
+def locked_directory(directory):
+    '''
+    Hold an exclusive flock on directory for the duration of the
+    block. Files that are replaced atomically can't be locked
+    themselves and a companion lock file would be left behind, so
+    writers of such files lock their directory instead.
+    '''
+    fd = os.open(directory, os.O_RDONLY)
+
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+        yield
+    finally:
+        os.close(fd)
+
+
 def generate_tempfile_name(directory=None, prefix=None):
     # create a unique name by creating a temporaryfile
     # then deleting & using the name.
@@ -174,6 +194,54 @@ def untarzip(tarname, dstpath, clobber, minclobberdepth, deletetar):
     return extractdir
 
 
+# ioctl request number for FICLONE, _IOW(0x94, 9, int)
+_FICLONE = 0x40049409
+
+FILE_PLACEMENT_METHODS = ('copy', 'hardlink', 'reflink')
+
+
+def place_file(srcfile, dstfile, method='copy'):
+    '''
+    Place srcfile at dstfile without interpreting its contents.
+
+    method is one of FILE_PLACEMENT_METHODS:
+
+      copy     - copy the file contents; on Linux shutil.copyfile
+                 does this in kernel space with os.sendfile.
+      hardlink - link dstfile to the same inode as srcfile.
+      reflink  - clone srcfile's extents into dstfile (copy-on-write
+                 filesystems such as btrfs and xfs).
+
+    hardlink and reflink fall back to copy when the filesystem or
+    the source and destination locations don't support them.
+    '''
+    if not method in FILE_PLACEMENT_METHODS:
+        raise ValueError('Unknown file placement method "%s". Must be one of {%s}. Quitting.' %
+                         (method, ', '.join(FILE_PLACEMENT_METHODS)))
+
+    if method == 'hardlink':
+        if os.path.lexists(dstfile):
+            os.remove(dstfile)
+
+        try:
+            os.link(srcfile, dstfile)
+            return
+        except OSError as e:
+            if not e.errno in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.EOPNOTSUPP):
+                raise
+
+    elif method == 'reflink':
+        with open(srcfile, 'rb') as srcf, open(dstfile, 'wb') as dstf:
+            try:
+                fcntl.ioctl(dstf.fileno(), _FICLONE, srcf.fileno())
+                return
+            except OSError as e:
+                if not e.errno in (errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTTY):
+                    raise
+
+    shutil.copyfile(srcfile, dstfile)
+
+
 def daemonize_command(commandstr,
                       stdout=None,
                       stderr=None,
@@ -214,9 +282,14 @@ def daemonize_command(commandstr,
     return (0, sp)
 
 
-def daemonize():
-    softlimit, hardlimit = resource.getrlimit(resource.RLIMIT_NOFILE)
-
+def daemonize(keep_fds=()):
+    '''
+    Double fork into a new session. Returns the child pid in the
+    calling process and 0 in the daemon, which has / as working
+    directory, umask 0, /dev/null as stdin, stdout and stderr and no
+    other descriptors open except those in keep_fds (above 2), such
+    as a pipe to report readiness.
+    '''
     pid = os.fork()
     if pid > 0:
         # parent should return to client calling daemonize
@@ -226,24 +299,63 @@ def daemonize():
     os.umask(0)
     os.setsid()
 
-    # double fork
+    # double fork, the intermediate child exits without unwinding
+    # so that it cannot return into the caller's threads or handlers
     pid = os.fork()
     if pid > 0:
-        sys.exit(0)
+        os._exit(0)
 
-    for fd in range(0, hardlimit):
-        try:
-            os.close(fd)
-        except:
-            pass
+    close_fds(keep_fds)
+
+    devnull = os.open("/dev/null", os.O_RDWR)
 
-    fd0 = os.open("/dev/null", os.O_RDWR)
-    fd1 = os.dup(fd0)
-    fd2 = os.dup(fd0)
+    for fd in (0, 1, 2):
+        if fd != devnull:
+            os.dup2(devnull, fd)
+
+    if devnull > 2:
+        os.close(devnull)
 
     return 0
 
 
+def close_fds(keep=()):
+    '''
+    Close every open file descriptor except those in keep.
+
+    The open descriptors are listed from /proc/self/fd so the cost
+    follows the number actually open, not the RLIMIT_NOFILE hard
+    limit (often 1048576). Without /proc, fall back to os.closerange
+    over the gaps between the kept descriptors, which python 3.10+
+    turns into close_range(2) calls.
+    '''
+    keep = set(keep)
+
+    try:
+        fds = [ int(fd) for fd in os.listdir('/proc/self/fd') ]
+    except OSError:
+        _, hardlimit = resource.getrlimit(resource.RLIMIT_NOFILE)
+
+        low = 0
+
+        for fd in sorted(keep) + [hardlimit]:
+            os.closerange(low, fd)
+
+            low = fd + 1
+
+        return
+
+    for fd in fds:
+        if fd in keep:
+            continue
+
+        # the descriptor listdir used is already closed
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+
+
 def hostsfromarg(hostlist):
     hosts = []
     for entry in hostlist:
@@ -49,6 +49,13 @@ class Wrapper:
          3. Arguments accepted by the wrapper for customizing execution -
             typically a subset of the wrapped application's command line
             arguments. The exposed arguments can be set at runtime.
+
+        The registrar calls are recorded once per wrapper class, from a
+        separate instance, and replayed for every run, so register
+        should make the same calls each time. A register method that
+        sets attributes on the wrapper, or uses the registrar for more
+        than the calls above, is instead called directly on each
+        running instance.
         '''
         pass
 
@@ -34,6 +34,7 @@ from __future__ import absolute_import, division, print_function
 
 import os
 import shlex
+import shutil
 from signal import SIGQUIT
 import subprocess
 import sys
@@ -43,10 +44,17 @@ import etce.timeutils
 from etce.argproxy import ArgProxy
 from etce.argregistrar import ArgRegistrar
 from etce.platform import Platform
+from etce.supervisorclient import SupervisorClient
 from etce.wrappererror import WrapperError
+from etce.wrapperloader import WrapperLoader
 from etce.wrapperstore import WrapperStore
 
 
+# (command, search paths) -> executable path, shared by every wrapper
+# context in the process
+_executable_cache = {}
+
+
 class WrapperContextImpl(ArgRegistrar):
     ''' WrapperContextImpl implements the WrapperContext interface.'''
     def __init__(self,
@@ -55,7 +63,8 @@ class WrapperContextImpl(ArgRegistrar):
                  trialargs,
                  testargs,
                  config,
-                 testdir):
+                 testdir,
+                 supervise=False):
         self._trialargs = trialargs
         self._testargs = testargs
         self._config = config
@@ -63,6 +72,9 @@ class WrapperContextImpl(ArgRegistrar):
         self._platform = Platform()
         self._wrappername = wrappername
         self._sudo = False
+        # launch daemons through the node supervisor rather than by forking
+        self._supervise = supervise or \
+            self._config.get('etce', 'SUPERVISE_DAEMONS').lower() == 'yes'
         self._default_pidfilename = \
             '%s/etce.%s.%s.pid' \
             % (os.path.join(self._config.get('etce', 'WORK_DIRECTORY'), 'lock'),
@@ -89,13 +101,22 @@ class WrapperContextImpl(ArgRegistrar):
         # these are the reserved args that cannot be overwritten
         self._reserved_args = set(self._args)
 
-        # fill in the arguments registered by the wrapper
-        wrapperinstance.register(self)
+        # fill in the arguments registered by the wrapper, replaying
+        # the registration recorded for its class where possible
+        registration = WrapperLoader.registration(wrapperinstance)
+
+        if registration is None:
+            wrapperinstance.register(self)
+        else:
+            for methodname, methodargs in registration:
+                getattr(self, methodname)(*methodargs)
 
         storefile = os.path.join(self._trialargs['logdirectory'],
                                  'etce.store')
 
-        self._wrapperstore = WrapperStore(storefile)
+        # store updates are written once, by flushstore, when the
+        # wrapper finishes
+        self._wrapperstore = WrapperStore(storefile, deferred=True)
 
         self._wrapperstore.update({'etce':{'starttime': self._trialargs['starttime']}},
                                   self._args['nodename'])
@@ -137,6 +158,10 @@ class WrapperContextImpl(ArgRegistrar):
                                   self._args['nodename'])
 
 
+    def flushstore(self):
+        self._wrapperstore.flush()
+
+
     @property
     def platform(self):
         return self._platform
@@ -170,6 +195,23 @@ class WrapperContextImpl(ArgRegistrar):
         # 1. call self.stop(pidfilename)
         self.stop(pidfilename)
 
+        # hand the command to the node supervisor when configured
+        if self._supervise:
+            if genpidfile and pidfilename is None:
+                pidfilename = self._default_pidfilename
+
+            print(commandstr)
+            sys.stdout.flush()
+
+            SupervisorClient().launch(commandstr,
+                                      name=os.path.basename(command),
+                                      stdout=stdout,
+                                      stderr=stderr,
+                                      starttime=starttime,
+                                      pidfile=pidfilename if genpidfile else None,
+                                      pidincrement=pidincrement)
+            return
+
         # run the command
         pid, subproc = etce.utils.daemonize_command(commandstr,
                                                     stdout,
@@ -264,19 +306,21 @@ class WrapperContextImpl(ArgRegistrar):
     def _build_commandstr(self, command, argstr, extra_paths):
         all_paths = os.environ['PATH'].split(':') + list(extra_paths)
 
-        existing_paths = filter(os.path.isdir, all_paths)
+        key = (command, tuple(all_paths))
+
+        commandpath = _executable_cache.get(key)
 
-        found_paths = []
+        # revalidate with a single stat in case the file was removed
+        if commandpath is None or not os.path.isfile(commandpath):
+            commandpath = shutil.which(command, path=os.pathsep.join(all_paths))
 
-        for existing_path in existing_paths:
-            if command in os.listdir(existing_path):
-                found_paths.append(existing_path)
+            if commandpath is None:
+                raise WrapperError('Cannot find command "%s" in system paths {%s}. Quitting.' \
+                                   % (command, ','.join(all_paths)))
 
-        if not found_paths:
-            raise WrapperError('Cannot find command "%s" in system paths {%s}. Quitting.' \
-                               % (command, ','.join(all_paths)))
+            _executable_cache[key] = commandpath
 
-        commandstr = ' '.join([os.path.join(found_paths[0], command), argstr])
+        commandstr = ' '.join([commandpath, argstr])
 
         # run with sudo if wrapper requested it
         if self._sudo:
@@ -30,19 +30,55 @@
 # POSSIBILITY OF SUCH DAMAGE.
 #
 
+import copy
 import importlib
+import json
+import os
 import pkgutil
 import sys
+import tempfile
+import threading
 
+from etce.argregistrar import ArgRegistrar
 from etce.config import ConfigDictionary
 
 
+class _RegistrationRecorder(ArgRegistrar):
+    def __init__(self):
+        self.calls = []
+
+    def register_argument(self, argname, defaultval, description):
+        self.calls.append(('register_argument', (argname, defaultval, description)))
+
+    def register_infile_name(self, name):
+        self.calls.append(('register_infile_name', (name,)))
+
+    def register_outfile_name(self, name):
+        self.calls.append(('register_outfile_name', (name,)))
+
+    def run_with_sudo(self):
+        self.calls.append(('run_with_sudo', ()))
+
+
 class WrapperLoader(object):
     """
     Provides methods for dynamically importing and
     instantiating ETCE Wrapper instances.
+
+    Wrapper classes found by loadwrapper, and the registrar calls each
+    wrapper class makes from its register method, are remembered for
+    the life of the process and shared by all loaders.
     """
 
+    # (wrappername, package prefixes) -> (full wrapper name, class)
+    _classes = {}
+
+    # wrapper class -> [(registrar method name, args)], or None
+    # when the class's register method cannot be recorded
+    _registrations = {}
+
+    _lock = threading.Lock()
+
     def __init__(self):
         self._config = ConfigDictionary()
 
@@ -91,11 +127,240 @@ class WrapperLoader(object):
                     pass
 
 
+    def wrapperindex(self, indexfile=None):
+        '''
+        Return a dictionary of wrapper name to its metadata: the
+        description (class docstring), the module file and the
+        registrar calls its register method makes. Metadata is cached
+        in indexfile, by default ~/.cache/etce/wrapperindex.json, and
+        a wrapper module is only imported again when it, or a module
+        defining one of its wrapper's base classes, has changed. Modules
+        that fail to import, and wrappers whose registered values don't
+        survive JSON unchanged (tuples, other objects), are not cached
+        and are always imported.
+        '''
+        if indexfile is None:
+            indexfile = os.path.join(os.path.expanduser('~'), '.cache', 'etce', 'wrapperindex.json')
+
+        cached = {}
+
+        try:
+            with open(indexfile) as indexf:
+                cached = json.load(indexf)
+        except (OSError, ValueError):
+            pass
+
+        index = {}
+
+        cacheable = {}
+
+        wrappermod = importlib.import_module('etcewrappers')
+
+        for modulefile, modpath in self._wrappermodules(wrappermod):
+            entry = cached.get(modulefile)
+
+            if entry is None or not self._filestatesmatch(entry.get('filestates', {})):
+                entry = self._indexentry(modpath, modulefile)
+
+                if entry['filestates'] is not None and \
+                   self._isjsonnative([entry['description'], entry['registration']]):
+                    # in the form it takes when read back from the index file
+                    entry = json.loads(json.dumps(entry))
+
+                    cacheable[modulefile] = entry
+            else:
+                cacheable[modulefile] = entry
+
+            index[modulefile] = entry
+
+        if cacheable != cached:
+            try:
+                os.makedirs(os.path.dirname(indexfile), exist_ok=True)
+
+                fd, tmpfile = tempfile.mkstemp(dir=os.path.dirname(indexfile))
+
+                with os.fdopen(fd, 'w') as tmpf:
+                    json.dump(cacheable, tmpf)
+
+                os.replace(tmpfile, indexfile)
+            except OSError:
+                # the index is only a cache
+                pass
+
+        return dict([(entry['name'], entry) for entry in index.values()
+                     if entry['name'] is not None])
+
+
+    def _filestatesmatch(self, filestates):
+        if not filestates:
+            return False
+
+        try:
+            for filename, filestate in filestates.items():
+                st = os.stat(filename)
+
+                if filestate != [st.st_mtime_ns, st.st_size]:
+                    return False
+        except OSError:
+            return False
+
+        return True
+
+
+    def _isjsonnative(self, value):
+        # registrar calls are themselves (name, args) tuples, only
+        # their contents need to be native
+        if value is None or isinstance(value, (str, bool, int, float)):
+            return True
+
+        if isinstance(value, list):
+            return all([self._isjsonnative(v) for v in value])
+
+        if isinstance(value, tuple) and len(value) == 2 and isinstance(value[0], str) \
+           and isinstance(value[1], tuple):
+            return all([self._isjsonnative(v) for v in value[1]])
+
+        if isinstance(value, dict):
+            return all([isinstance(k, str) and self._isjsonnative(v)
+                        for k, v in value.items()])
+
+        return False
+
+
+    def _wrappermodules(self, rootmodule):
+        # every module file under the package directories, found
+        # without importing anything
+        for rootdir in rootmodule.__path__:
+            for dirpath, dirnames, filenames in os.walk(rootdir):
+                # the root may be a namespace package, subpackages
+                # must be regular packages, as for pkgutil
+                if dirpath != rootdir and \
+                   not os.path.isfile(os.path.join(dirpath, '__init__.py')):
+                    dirnames[:] = []
+                    continue
+
+                dirnames.sort()
+
+                relpath = os.path.relpath(dirpath, rootdir)
+
+                packagepath = [rootmodule.__name__] + \
+                    ([] if relpath == '.' else relpath.split(os.sep))
+
+                for filename in sorted(filenames):
+                    if filename.endswith('.py') and filename != '__init__.py':
+                        yield (os.path.join(dirpath, filename),
+                               '.'.join(packagepath + [filename[:-3]]))
+
+
+    def _indexentry(self, modpath, modulefile):
+        # name is None for modules that do not hold a wrapper
+        entry = {'name':None, 'description':None, 'registration':None}
+
+        # the wrapper module and the modules defining its base classes
+        dependencies = set([os.path.abspath(modulefile)])
+
+        basename = modpath.split('.')[-1]
+
+        try:
+            module = importlib.import_module(modpath)
+
+            for key in module.__dict__:
+                if key.upper() == basename.upper() and callable(module.__dict__[key]):
+                    instance = module.__dict__[key]()
+
+                    entry['name'] = '.'.join(modpath.split('.')[1:])
+
+                    entry['description'] = instance.__doc__
+
+                    entry['registration'] = WrapperLoader.registration(instance)
+
+                    for cls in type(instance).__mro__:
+                        dependency = getattr(sys.modules.get(cls.__module__), '__file__', None)
+
+                        if dependency:
+                            dependencies.add(os.path.abspath(dependency))
+
+                    break
+        except Exception:
+            # not cacheable, the import may succeed once a missing
+            # dependency is installed
+            entry['filestates'] = None
+
+            return entry
+
+        entry['filestates'] = {}
+
+        for dependency in sorted(dependencies):
+            st = os.stat(dependency)
+
+            entry['filestates'][dependency] = [st.st_mtime_ns, st.st_size]
+
+        return entry
+
+
     def loadwrapper(self,
                     wrappername,
                     packageprefixfilter=(None,)):
-        wrapper = None
+        key = (wrappername, tuple(packageprefixfilter))
+
+        with WrapperLoader._lock:
+            found = WrapperLoader._classes.get(key)
+
+            if found is None:
+                found = self._find_wrapper_class(wrappername, packageprefixfilter)
+
+                WrapperLoader._classes[key] = found
+
+        fullname, candidateclass = found
+
+        return (fullname, candidateclass())
+
+
+    @staticmethod
+    def registration(wrapperinstance):
+        '''
+        Return the list of (ArgRegistrar method name, args) calls the
+        wrapper makes from its register method, recorded once per
+        wrapper class, or None if register does more than call
+        ArgRegistrar methods, or sets attributes on the wrapper, and
+        so must be called directly.
+        '''
+        wrapperclass = type(wrapperinstance)
+
+        with WrapperLoader._lock:
+            if not wrapperclass in WrapperLoader._registrations:
+                recorder = _RegistrationRecorder()
+
+                try:
+                    instance = wrapperclass()
+
+                    attributes = dict(vars(instance))
+
+                    instance.register(recorder)
+
+                    calls = recorder.calls
+
+                    # instance state set up by register would be lost
+                    # on replay
+                    if vars(instance).keys() != attributes.keys() or \
+                       [key for key, value in attributes.items()
+                        if not vars(instance)[key] is value]:
+                        calls = None
+                except Exception:
+                    calls = None
+
+                WrapperLoader._registrations[wrapperclass] = calls
 
+            calls = WrapperLoader._registrations[wrapperclass]
+
+        if calls is None:
+            return None
+
+        # argument defaults may be mutable, give each caller its own
+        return copy.deepcopy(calls)
+
+
+    def _find_wrapper_class(self, wrappername, packageprefixfilter):
         for packagename in packageprefixfilter:
             wrapper = self._load_module(wrappername, packagename, 'etcewrappers')
 
@@ -104,8 +369,6 @@ class WrapperLoader(object):
 
                 candidateclassname = basename.upper()
 
-                classinstance = None
-
                 for key in wrapper.__dict__:
                     if key.upper() == candidateclassname:
 
@@ -115,7 +378,7 @@ class WrapperLoader(object):
                             fullname = '%s.%s' % (packagename, wrappername) \
                                 if packagename else wrappername
 
-                            return (fullname, candidateclass())
+                            return (fullname, candidateclass)
 
         message = 'No wrapper "%s" found' % wrappername
         raise RuntimeError(message)
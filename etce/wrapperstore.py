@@ -30,8 +30,14 @@
 # POSSIBILITY OF SUCH DAMAGE.
 #
 
+from contextlib import contextmanager
+import copy
 import json
 import os
+import tempfile
+import threading
+
+import etce.utils
 
 
 class WrapperStore(object):
@@ -41,32 +47,130 @@ class WrapperStore(object):
     to the etce.store file in each of the host data directories.
     A store is automatically past to each wrapper as part of the
     WrapperContext and can be accessed via the ctx.store method.
+
+    The parsed store is kept in memory and shared by all instances
+    for the same file in a process, and only reread when another
+    process changes the file. Updates are merged under an exclusive
+    lock on the store's directory and written atomically, and updates
+    that change nothing are not written. A deferred store, and
+    updates made inside a batch() block, hold updates until flush()
+    or the end of the block.
     """
 
-    def __init__(self, backingfilename):
+    # backing file name -> [file state, store], file state is
+    # (st_mtime_ns, st_size, st_ino) of the file the store was read
+    # from or last written to
+    _states = {}
+
+    _states_lock = threading.Lock()
+
+    def __init__(self, backingfilename, deferred=False):
         if len(backingfilename) == 0:
             raise ValueError('ETCEStore backingfilename cannot be length 0.')
 
         self._backingfile = backingfilename
 
+        self._pending = [] if deferred else None
 
-    def read(self):
-        store = {}
+        # a process forked from the owner, a daemonized wrapper, must
+        # not write the owner's deferred updates
+        self._ownerpid = os.getpid()
 
-        with open(self._backingfile, 'r') as fd:
-            # read out
-            try:
-                store = json.load(fd)
-            except:
-                pass
 
-        return store
+    def read(self):
+        with WrapperStore._states_lock:
+            return copy.deepcopy(self._load())
 
 
     def update(self, namevaldict, section=None):
+        if self._pending is not None:
+            # hold what the caller stored now, not what its dict
+            # holds at flush time
+            self._pending.append((copy.deepcopy(namevaldict), section))
+            return
+
+        self._flush([(namevaldict, section)])
+
+
+    def flush(self):
+        '''
+        Write the updates held by a deferred store.
+        '''
+        if not self._pending or os.getpid() != self._ownerpid:
+            return
+
+        pending, self._pending = self._pending, []
+
+        self._flush(pending)
+
+
+    @contextmanager
+    def batch(self):
+        '''
+        Defer updates made in the block to a single write at its end.
+        '''
+        if self._pending is not None:
+            yield self
+            return
+
+        self._pending = []
+
+        try:
+            yield self
+        finally:
+            pending, self._pending = self._pending, None
+
+            if pending and os.getpid() == self._ownerpid:
+                self._flush(pending)
+
+
+    def _flush(self, updates):
+        directory = os.path.dirname(os.path.abspath(self._backingfile))
+
+        with WrapperStore._states_lock, etce.utils.locked_directory(directory):
+            store = self._load()
+
+            changed = not os.path.exists(self._backingfile)
+
+            for namevaldict, section in updates:
+                target = store
+
+                if section:
+                    # add to subsection
+                    if not section in store:
+                        store[section] = {}
+                    target = store[section]
+
+                for name, val in namevaldict.items():
+                    if not name in target or target[name] != val:
+                        target[name] = copy.deepcopy(val)
+
+                        changed = True
+
+            if changed:
+                self._write(json.dumps(store, sort_keys=True))
+
+
+    def _filestate(self):
+        try:
+            st = os.stat(self._backingfile)
+
+            return (st.st_mtime_ns, st.st_size, st.st_ino)
+        except OSError:
+            return None
+
+
+    def _load(self):
+        filestate = self._filestate()
+
+        state = WrapperStore._states.get(self._backingfile)
+
+        if state and state[0] == filestate:
+            return state[1]
+
         store = {}
 
-        if os.path.exists(self._backingfile):
+        if filestate is not None:
             with open(self._backingfile, 'r') as fd:
                 # read out
                 try:
@@ -74,15 +178,29 @@ class WrapperStore(object):
                 except:
                     pass
 
-        if section:
-            # add to subsection
-            if not section in store:
-                store[section] = {}
-            store[section].update(namevaldict)
-        else:
-            # add to root
-            store.update(namevaldict)
-
-        with open(self._backingfile, 'w+') as fd:
-            # write back out
-            json.dump(store, fd)
+        WrapperStore._states[self._backingfile] = [filestate, store]
+
+        return store
+
+
+    def _write(self, content):
+        dirname = os.path.dirname(os.path.abspath(self._backingfile))
+
+        fd, tmpfile = tempfile.mkstemp(dir=dirname, prefix='.etce.store.')
+
+        try:
+            with os.fdopen(fd, 'w') as tmpf:
+                # write back out
+                tmpf.write(content)
+
+            os.chmod(tmpfile, 0o644)
+
+            os.replace(tmpfile, self._backingfile)
+        except:
+            os.remove(tmpfile)
+
+            # the in memory store no longer matches the file
+            WrapperStore._states.pop(self._backingfile, None)
+            raise
+
+        WrapperStore._states[self._backingfile][0] = self._filestate()
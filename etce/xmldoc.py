@@ -30,12 +30,53 @@
 # POSSIBILITY OF SUCH DAMAGE.
 #
 
-from pkg_resources import resource_filename
+import importlib
+import os.path
+import threading
+
 from lxml import etree
 from lxml.etree import DocumentInvalid, XMLSyntaxError
 
 from etce.xmldocerror import XMLDocError
 
+try:
+    from importlib.resources import files as _resource_files
+except ImportError:
+    _resource_files = None
+
+
+def schema_filename(schemamodule, schemafile):
+    '''
+    Return the path of schemafile installed in package schemamodule.
+    '''
+    if _resource_files:
+        return str(_resource_files(schemamodule).joinpath(schemafile))
+
+    module = importlib.import_module(schemamodule)
+
+    return os.path.join(os.path.dirname(module.__file__), schemafile)
+
+
+# (schemamodule, schemafile) -> (XMLSchema, validation lock). Each
+# schema is compiled once per process. lxml schema validators must
+# not be used from more than one thread at a time, hence the lock.
+_schemas = {}
+
+_schemas_lock = threading.Lock()
+
+
+def get_schema(schemamodule, schemafile):
+    key = (schemamodule, schemafile)
+
+    with _schemas_lock:
+        if not key in _schemas:
+            schema = etree.XMLSchema(etree.parse(schema_filename(schemamodule, schemafile)))
+
+            _schemas[key] = (schema, threading.Lock())
+
+        return _schemas[key]
+
+
 class XMLDoc(object):
     """
     Base class for parsing and validating ETCE XML
@@ -43,7 +84,7 @@ class XMLDoc(object):
     """
 
     def __init__(self, schemafile, schemamodule='etce'):
-        self._schema = etree.XMLSchema(etree.parse(resource_filename(schemamodule, schemafile)))
+        self._schema, self._schema_lock = get_schema(schemamodule, schemafile)
 
 
     def parse(self, xmlfile):
@@ -56,7 +97,8 @@ class XMLDoc(object):
             raise XMLDocError(err)
 
         try:
-            self._schema.assertValid(xml_doc)
+            with self._schema_lock:
+                self._schema.assertValid(xml_doc)
         except DocumentInvalid as e:
             err = '%s failed to validate with error:\n\t%s' %(xmlfile, str(e))
             raise XMLDocError(err)
@@ -77,24 +77,15 @@ class InterfaceCheck(Wrapper):
 
         print('waiting for %s' % ctx.args.devicenames)
 
-        allup = False
+        starttime = time.time()
 
-        for i in range(waitsecs):
-            allup = True
+        notup = ctx.platform.waitfordevices(devicenames, waitsecs)
 
-            for devicename in devicenames:
-                if ctx.platform.isdeviceup(devicename):
-                    print('[%2d]: %s state is UP' % (i, devicename))
-                else:
-                    allup = False
+        if notup:
+            raise RuntimeError('one or all of devices "%s" not found' % ','.join(notup))
 
-            time.sleep(1)
-
-            if allup:
-                break
-
-        if not allup:
-            raise RuntimeError('one or all of devices "%s" not found' % ctx.args.devicenames)
+        print('%s state is UP after %.3f seconds' % \
+              (ctx.args.devicenames, time.time() - starttime))
 
 
     def stop(self, ctx):
@@ -31,7 +31,6 @@
 #
 
 from __future__ import absolute_import, division, print_function
-import socket
 import time
 from etce.wrapper import Wrapper
 
@@ -79,30 +78,15 @@ class SocketCheck(Wrapper):
 
         print('waiting for %s' % ctx.args.sockets)
 
-        allup = False
+        starttime = time.time()
 
-        s = socket.socket()
+        notopen = ctx.platform.waitforsockets(sockets, waitsecs)
 
-        for i in range(waitsecs):
-            allup = True
+        if notopen:
+            raise RuntimeError('one or all of sockets "%s" not open' % \
+                               ','.join(['%s:%d' % address for address in notopen]))
 
-            for socket in sockets:
-                try:
-                    s.connect(socket)
-                    s.close()
-                    allopen = True
-                except:
-                    allopen = False
-                    time.sleep(1)
-                    break
-
-            time.sleep(1)
-
-            if allup:
-                break
-
-        if not allup:
-            raise RuntimeError('one or all of sockets "%s" not open' % sockets)
+        print('%s open after %.3f seconds' % (ctx.args.sockets, time.time() - starttime))
 
 
     def stop(self, ctx):
@@ -0,0 +1,163 @@
+#
+# Copyright (c) 2026 - Adjacent Link LLC, Bridgewater, New Jersey
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in
+#   the documentation and/or other materials provided with the
+#   distribution.
+# * Neither the name of Adjacent Link LLC nor the names of its
+#   contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+
+'''
+Time daemon startup with etce.utils.daemonize against the previous
+approach of calling close on every descriptor up to the
+RLIMIT_NOFILE hard limit:
+
+  legacy  - fork, close(fd) for fd in range(hardlimit), exit
+  close   - fork, etce.utils.close_fds(), exit
+  spawn   - etce.utils.daemonize() until the daemon reports ready
+
+The hard limit can only be raised by root; run as root with --limit
+to measure at the large limits common on current distributions.
+
+usage: daemonize_benchmark.py [--limit N] [--openfds 16]
+                              [--repeat 20] [--json FILE]
+'''
+
+from __future__ import absolute_import, division, print_function
+
+import argparse
+import json
+import os
+import resource
+import time
+
+import etce.utils
+
+
+def legacy_close():
+    _, hardlimit = resource.getrlimit(resource.RLIMIT_NOFILE)
+
+    for fd in range(0, hardlimit):
+        try:
+            os.close(fd)
+        except:
+            pass
+
+
+def time_child(closefunc):
+    starttime = time.time()
+
+    pid = os.fork()
+
+    if pid == 0:
+        closefunc()
+        os._exit(0)
+
+    os.waitpid(pid, 0)
+
+    return time.time() - starttime
+
+
+def time_spawn():
+    readfd, writefd = os.pipe()
+
+    starttime = time.time()
+
+    pid = etce.utils.daemonize(keep_fds=(writefd,))
+
+    if pid == 0:
+        os.write(writefd, b'x')
+        os._exit(0)
+
+    os.close(writefd)
+
+    os.read(readfd, 1)
+
+    elapsed = time.time() - starttime
+
+    os.close(readfd)
+
+    # reap the intermediate child
+    os.waitpid(pid, 0)
+
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time daemon startup descriptor cleanup.')
+
+    parser.add_argument('--limit',
+                        type=int,
+                        default=None,
+                        help='Set the RLIMIT_NOFILE soft and hard limits first ' \
+                        '(raising the hard limit requires root).')
+    parser.add_argument('--openfds',
+                        type=int,
+                        default=16,
+                        help='Extra descriptors to hold open while timing. default: 16.')
+    parser.add_argument('--repeat',
+                        type=int,
+                        default=20,
+                        help='Runs per stage, the fastest is reported. default: 20.')
+    parser.add_argument('--json',
+                        default=None,
+                        help='Also write the results to this file as JSON.')
+
+    args = parser.parse_args()
+
+    if args.limit:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (args.limit, args.limit))
+
+    _, hardlimit = resource.getrlimit(resource.RLIMIT_NOFILE)
+
+    held = [ os.open(os.devnull, os.O_RDONLY) for _ in range(args.openfds) ]
+
+    stages = (('legacy', lambda: time_child(legacy_close)),
+              ('close', lambda: time_child(etce.utils.close_fds)),
+              ('spawn', time_spawn))
+
+    results = {'hardlimit':hardlimit}
+
+    for stage, timer in stages:
+        results[stage] = min([ timer() for _ in range(args.repeat) ])
+
+    for fd in held:
+        os.close(fd)
+
+    print('hard limit %d' % hardlimit)
+
+    for stage, _ in stages:
+        print('%10s %10.6f' % (stage, results[stage]))
+
+    print('%10s %10.1fx' % ('speedup', results['legacy'] / results['close']))
+
+    if args.json:
+        with open(args.json, 'w') as jsonf:
+            json.dump(results, jsonf, indent=2)
+
+
+if __name__ == '__main__':
+    main()
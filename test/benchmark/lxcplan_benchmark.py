@@ -0,0 +1,262 @@
+#
+# Copyright (c) 2026 - Adjacent Link LLC, Bridgewater, New Jersey
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in
+#   the documentation and/or other materials provided with the
+#   distribution.
+# * Neither the name of Adjacent Link LLC nor the names of its
+#   contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+
+'''
+Time LXC plan handling as the number of containers grows, on
+synthetic plans generated at each scale:
+
+  parse   - LXCPlanFileDoc construction
+  render  - lxc.container.conf generation for every container
+  hosts   - writing every container's hosts entries to a hosts file
+  dryrun  - LXCManagerImpl.start(dryrun=True) for the local host
+
+Stages run against a temporary ETCE WORK_DIRECTORY and hosts file,
+never the live ones. Parsing detects the LXC version with
+lxc-execute, so LXC must be installed. Run from the top of the
+source tree with PYTHONPATH=. or against an installed etce.
+
+usage: lxcplan_benchmark.py [--scales 10,100,1000] [--hosts 1]
+                            [--bridges 2] [--repeat 3] [--json FILE]
+'''
+
+from __future__ import absolute_import, division, print_function
+
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import time
+
+from etce.hostsfile import HostsFile
+from etce.lxcmanager import LXCManagerImpl
+from etce.lxcplanfiledoc import LXCPlanFileDoc
+
+
+def generate_plan(planfile, numhosts, numcontainers, numbridges):
+    '''
+    Write a synthetic LXC plan file to planfile: numhosts hosts, the
+    first named for this machine, each with numcontainers containers
+    spread over numbridges bridges. Containers are built from a
+    template with a parent and use overlays, an overlaylist, hosts
+    entries and an init script.
+    '''
+    lines = []
+
+    lines.append('<lxcplan>')
+    lines.append('  <containertemplates>')
+    lines.append('    <containertemplate name="base">')
+    lines.append('      <parameters>')
+    lines.append('        <parameter name="lxc.tty" value="1"/>')
+    lines.append('        <parameter name="lxc.pts" value="128"/>')
+    lines.append('        <parameter name="lxc.console" value="none"/>')
+    lines.append('      </parameters>')
+    lines.append('    </containertemplate>')
+    lines.append('    <containertemplate name="node" parent="base">')
+    lines.append('      <parameters>')
+    lines.append('        <parameter name="lxc.mount.entry" '
+                 'value="${lxc_directory}/var/log var/log none bind 0 0"/>')
+    lines.append('      </parameters>')
+    lines.append('      <interfaces>')
+    lines.append('        <interface bridge="br${lxc_index %% %d}" '
+                 'hosts_entry_ipv4="node-${lxc_index}">' % numbridges)
+    lines.append('          <parameter name="lxc.network.type" value="veth"/>')
+    lines.append('          <parameter name="lxc.network.name" value="${device}"/>')
+    lines.append('          <parameter name="lxc.network.flags" value="up"/>')
+    lines.append('          <parameter name="lxc.network.hwaddr" '
+                 'value="02:00:${\'%02x\' % host_index}:00:${\'%02x\' % (lxc_index // 256)}:'
+                 '${\'%02x\' % (lxc_index % 256)}"/>')
+    lines.append('          <parameter name="lxc.network.ipv4" '
+                 'value="10.${host_index}.${lxc_index // 250}.${lxc_index % 250 + 1}/8"/>')
+    lines.append('        </interface>')
+    lines.append('      </interfaces>')
+    lines.append('      <initscript>')
+    lines.append('echo ${lxc_name} ${role}')
+    lines.append('      </initscript>')
+    lines.append('    </containertemplate>')
+    lines.append('  </containertemplates>')
+    lines.append('  <hosts>')
+
+    localhost = socket.gethostname().split('.')[0]
+
+    roles = ','.join(['role%d' % (i % 4) for i in range(numcontainers)])
+
+    for hostindex in range(numhosts):
+        hostname = localhost if hostindex == 0 else 'bench-host-%d' % hostindex
+
+        lines.append('    <host hostname="%s">' % hostname)
+        lines.append('      <containers>')
+        lines.append('        <container lxc_name="h%d-node-${lxc_index}" '
+                     'lxc_indices="1-%d" template="node">' % (hostindex, numcontainers))
+        lines.append('          <overlays>')
+        lines.append('            <overlay name="host_index" value="%d"/>' % hostindex)
+        lines.append('            <overlay name="device" value="backchan0"/>')
+        lines.append('            <overlaylist name="role" values="%s"/>' % roles)
+        lines.append('          </overlays>')
+        lines.append('        </container>')
+        lines.append('      </containers>')
+        lines.append('    </host>')
+
+    lines.append('  </hosts>')
+    lines.append('</lxcplan>')
+
+    with open(planfile, 'w') as planf:
+        planf.write('\n'.join(lines) + '\n')
+
+
+def run_scale(workdir, numhosts, numcontainers, numbridges):
+    planfile = os.path.join(workdir, 'plan.%d.xml' % numcontainers)
+
+    generate_plan(planfile, numhosts, numcontainers, numbridges)
+
+    timings = {}
+
+    starttime = time.time()
+
+    plandoc = LXCPlanFileDoc(planfile)
+
+    timings['parse'] = time.time() - starttime
+
+    hostname = socket.gethostname().split('.')[0]
+
+    containers = plandoc.containers(hostname)
+
+    starttime = time.time()
+
+    for container in containers:
+        str(container)
+
+    timings['render'] = time.time() - starttime
+
+    entries = []
+
+    for container in containers:
+        for hostentry, hostaddr in container.hosts_entries_ipv4:
+            entries.append((hostaddr, hostentry))
+
+    hostsfilename = os.path.join(workdir, 'hosts')
+
+    with open(hostsfilename, 'w') as hostsf:
+        hostsf.write('127.0.0.1 localhost\n')
+
+    starttime = time.time()
+
+    HostsFile.update(plandoc.lxc_root_directory(hostname), entries, hostsfilename)
+
+    timings['hosts'] = time.time() - starttime
+
+    starttime = time.time()
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        LXCManagerImpl().start(plandoc, writehosts=False, dryrun=True)
+
+    timings['dryrun'] = time.time() - starttime
+
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time LXC plan handling at several scales.')
+
+    parser.add_argument('--scales',
+                        default='10,100,1000',
+                        help='Comma separated container counts per host. default: 10,100,1000.')
+    parser.add_argument('--hosts',
+                        type=int,
+                        default=1,
+                        help='Number of hosts in each plan. default: 1.')
+    parser.add_argument('--bridges',
+                        type=int,
+                        default=2,
+                        help='Number of bridges per host. default: 2.')
+    parser.add_argument('--repeat',
+                        type=int,
+                        default=3,
+                        help='Runs per scale, the fastest is reported. default: 3.')
+    parser.add_argument('--json',
+                        default=None,
+                        help='Also write the results to this file as JSON.')
+
+    args = parser.parse_args()
+
+    if not shutil.which('lxc-execute'):
+        print('lxc-execute not found. LXC must be installed to parse LXC plans. Quitting.',
+              file=sys.stderr)
+        exit(1)
+
+    workdir = tempfile.mkdtemp(prefix='lxcplanbench.', dir='/tmp')
+
+    # point ETCE at a private configuration and work directory
+    with open(os.path.join(workdir, 'etce.conf'), 'w') as conff:
+        conff.write('[etce]\nWORK_DIRECTORY=%s\n' % os.path.join(workdir, 'work'))
+
+    os.makedirs(os.path.join(workdir, 'work'))
+
+    os.environ['ETCECONFIGDIR'] = workdir
+
+    stages = ('parse', 'render', 'hosts', 'dryrun')
+
+    results = []
+
+    try:
+        print('%10s %10s %10s %10s %10s' % (('containers',) + stages))
+
+        for numcontainers in [int(scale) for scale in args.scales.split(',')]:
+            best = {}
+
+            for _ in range(args.repeat):
+                for stage, seconds in run_scale(workdir,
+                                                args.hosts,
+                                                numcontainers,
+                                                args.bridges).items():
+                    best[stage] = min(best.get(stage, seconds), seconds)
+
+            print('%10d %10.3f %10.3f %10.3f %10.3f' % \
+                  ((numcontainers,) + tuple([best[stage] for stage in stages])))
+
+            results.append({'hosts':args.hosts,
+                            'containers':numcontainers,
+                            'bridges':args.bridges,
+                            'seconds':best})
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w') as jsonf:
+            json.dump(results, jsonf, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -48,5 +48,17 @@ class TestChainMap(unittest.TestCase):
 
     def test_miss(self):
         with self.assertRaises(KeyError):
-            print self.chainmap['foo7']
+            print(self.chainmap['foo7'])
+
+
+    def test_keys(self):
+        self.assertEqual(set(self.chainmap), set(['foo1', 'foo2', 'foo3', 'foo4']))
+        self.assertEqual(len(self.chainmap), 4)
+        self.assertIn('foo4', self.chainmap)
+        self.assertNotIn('foo7', self.chainmap)
+
+
+    def test_flatten(self):
+        self.assertEqual(self.chainmap.flatten(),
+                         {'foo1': 1, 'foo2': 2, 'foo3': 3, 'foo4': 4})
 
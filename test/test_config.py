@@ -0,0 +1,100 @@
+#
+# Copyright (c) 2026 - Adjacent Link LLC, Bridgewater, New Jersey
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in
+#   the documentation and/or other materials provided with the
+#   distribution.
+# * Neither the name of Adjacent Link LLC nor the names of its
+#   contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+
+import configparser
+import os
+import shutil
+import tempfile
+import unittest
+
+from etce.config import ConfigDictionary
+
+
+class TestConfigDictionary(unittest.TestCase):
+    def setUp(self):
+        self.configdir = tempfile.mkdtemp()
+
+        self.saved_configdir = os.environ.get('ETCECONFIGDIR')
+
+        os.environ['ETCECONFIGDIR'] = self.configdir
+
+        self._write('[overlays]\nfoo=1\n')
+
+
+    def tearDown(self):
+        if self.saved_configdir is None:
+            os.environ.pop('ETCECONFIGDIR')
+        else:
+            os.environ['ETCECONFIGDIR'] = self.saved_configdir
+
+        shutil.rmtree(self.configdir)
+
+
+    def _write(self, content):
+        with open(os.path.join(self.configdir, 'etce.conf'), 'w') as f:
+            f.write(content)
+
+
+    def test_defaults(self):
+        config = ConfigDictionary()
+
+        self.assertEqual(config.get('etce', 'WORK_DIRECTORY'),
+                         ConfigDictionary.default_working_directory)
+        self.assertEqual(config.items('overlays'), [('foo', '1')])
+        self.assertEqual(config.get('overlays', 'bar', 'none'), 'none')
+
+
+    def test_reread_on_change(self):
+        self.assertEqual(ConfigDictionary().get('overlays', 'bar'), None)
+
+        self._write('[overlays]\nfoo=1\nbar=22\n')
+
+        self.assertEqual(ConfigDictionary().get('overlays', 'bar'), '22')
+
+
+    def test_asdict_copy(self):
+        ConfigDictionary().asdict()['overlays']['foo'] = '2'
+
+        self.assertEqual(ConfigDictionary().get('overlays', 'foo'), '1')
+
+
+    def test_bad_interpolation(self):
+        self._write('[overlays]\nfoo=1\nload=50%\n')
+
+        config = ConfigDictionary()
+
+        self.assertEqual(config.get('etce', 'WORK_DIRECTORY'),
+                         ConfigDictionary.default_working_directory)
+        self.assertEqual(config.get('overlays', 'foo'), '1')
+
+        with self.assertRaises(configparser.InterpolationSyntaxError):
+            config.get('overlays', 'load')
@@ -0,0 +1,63 @@
+#
+# Copyright (c) 2026 - Adjacent Link LLC, Bridgewater, New Jersey
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in
+#   the documentation and/or other materials provided with the
+#   distribution.
+# * Neither the name of Adjacent Link LLC nor the names of its
+#   contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+
+import unittest
+
+from etce.cpuallocator import CPUAllocator, cpulist_str
+
+
+class TestCPUAllocator(unittest.TestCase):
+    def setUp(self):
+        # two NUMA nodes of four cores
+        self.allocator = CPUAllocator(range(8), dict([(cpu, cpu // 4) for cpu in range(8)]))
+
+
+    def test_packing(self):
+        self.assertEqual(self.allocator.allocate(2), ([0, 1], [0]))
+        self.assertEqual(self.allocator.allocate(3), ([4, 5, 6], [1]))
+        self.assertEqual(self.allocator.allocate(2), ([2, 3], [0]))
+        # pool exhausted, share cores on the node with the free core
+        self.assertEqual(self.allocator.allocate(2), ([4, 7], [1]))
+
+
+    def test_numanode(self):
+        self.assertEqual(self.allocator.allocate(2, numanode=1), ([4, 5], [1]))
+        self.assertEqual(self.allocator.allocate(4, numanode=1), ([0, 1, 6, 7], [0, 1]))
+
+
+    def test_pool_too_small(self):
+        with self.assertRaises(ValueError):
+            self.allocator.allocate(9)
+
+
+    def test_cpulist_str(self):
+        self.assertEqual(cpulist_str([7, 0, 1, 2, 5]), '0-2,5,7')
@@ -0,0 +1,109 @@
+#
+# Copyright (c) 2026 - Adjacent Link LLC, Bridgewater, New Jersey
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in
+#   the documentation and/or other materials provided with the
+#   distribution.
+# * Neither the name of Adjacent Link LLC nor the names of its
+#   contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+
+import collections
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+import etce.utils
+from etce.executer import Executer
+
+
+WrapperEntry = collections.namedtuple('WrapperEntry', ['name', 'decorator', 'after'])
+
+
+class TestRunConcurrent(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+        self.cwd = os.getcwd()
+
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+
+        shutil.rmtree(self.tmpdir)
+
+
+    def runwrapper(self, methodname, fullwrappername, wrapperinstance, trialargs, testargs,
+                   supervise=False):
+        # wrapperinstance stands in for the wrapper's run method
+        wrapperinstance()
+
+        with open(os.path.join(self.tmpdir, fullwrappername), 'a') as markf:
+            markf.write('%d\n' % os.getpid())
+
+
+    def test_forking_wrapper(self):
+        daemonfile = os.path.join(self.tmpdir, 'daemon')
+
+        def forking():
+            # the pattern wrappers use to leave a process behind
+            if etce.utils.daemonize() > 0:
+                return
+
+            with open(daemonfile, 'w') as daemonf:
+                daemonf.write('%d\n' % os.getpid())
+
+            sys.exit(0)
+
+        executer = Executer.__new__(Executer)
+
+        executer._runwrapper = self.runwrapper
+
+        jobs = [ (WrapperEntry('w%d' % i, None, []), 'run', 'w%d' % i,
+                  forking if i == 0 else (lambda: time.sleep(0.1)), {})
+                 for i in range(4) ]
+
+        executer._runconcurrent(jobs, 2, self.tmpdir, {})
+
+        deadline = time.time() + 5
+
+        while not os.path.exists(daemonfile) and time.time() < deadline:
+            time.sleep(0.05)
+
+        # give a runaway child time to run queued wrappers
+        time.sleep(0.3)
+
+        self.assertTrue(os.path.exists(daemonfile))
+
+        for i in range(4):
+            with open(os.path.join(self.tmpdir, 'w%d' % i)) as markf:
+                self.assertEqual(markf.read(), '%d\n' % os.getpid())
+
+
+if __name__ == '__main__':
+    unittest.main()
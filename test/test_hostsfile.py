@@ -0,0 +1,87 @@
+#
+# Copyright (c) 2026 - Adjacent Link LLC, Bridgewater, New Jersey
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in
+#   the documentation and/or other materials provided with the
+#   distribution.
+# * Neither the name of Adjacent Link LLC nor the names of its
+#   contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from etce.hostsfile import HostsFile
+
+
+class TestHostsFile(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+        self.filename = os.path.join(self.tmpdir, 'hosts')
+
+        with open(self.filename, 'w') as hostsf:
+            hostsf.write('127.0.0.1 localhost\n'
+                         '10.0.0.1 server # comment\n'
+                         '\n'
+                         '#### Start auto-generated ETCE control mappings\n'
+                         '10.1.0.1 legacy-1\n'
+                         '#### Stop auto-generated ETCE control mappings\n'
+                         '10.9.9.9 after\n')
+
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+
+    def test_parse(self):
+        hostsfile = HostsFile(self.filename)
+
+        self.assertEqual(hostsfile.blocknames(), [''])
+        self.assertEqual(hostsfile.block(''), [('10.1.0.1', 'legacy-1')])
+        self.assertEqual(hostsfile.collisions('field', [('10.0.0.1', 'a'), ('10.2.0.1', 'after')]),
+                         ['10.0.0.1', 'after'])
+
+
+    def test_blocks_coexist(self):
+        # the unnamed block is replaced by the first named block
+        self.assertEqual(HostsFile.update('field1', [('10.1.0.1', 'node-1')], self.filename), [])
+        self.assertEqual(HostsFile.update('field2', [('10.3.0.1', 'node-1')], self.filename), ['node-1'])
+        self.assertEqual(HostsFile.update('field2', [('10.3.0.1', 'other-1')], self.filename), [])
+        self.assertEqual(HostsFile.update('field1', [('10.2.0.2', 'node-2')], self.filename), [])
+
+        hostsfile = HostsFile(self.filename)
+
+        self.assertEqual(hostsfile.blocknames(), ['field1', 'field2'])
+        self.assertEqual(hostsfile.block('field1'), [('10.2.0.2', 'node-2')])
+
+        HostsFile.update('field1', None, self.filename)
+
+        hostsfile = HostsFile(self.filename)
+
+        self.assertEqual(hostsfile.blocknames(), ['field2'])
+        self.assertEqual(hostsfile.collisions('field3', [('10.9.9.9', 'x')]), ['10.9.9.9'])
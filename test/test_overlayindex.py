@@ -0,0 +1,58 @@
+#
+# Copyright (c) 2026 - Adjacent Link LLC, Bridgewater, New Jersey
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in
+#   the documentation and/or other materials provided with the
+#   distribution.
+# * Neither the name of Adjacent Link LLC nor the names of its
+#   contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+
+import unittest
+
+from etce.overlayindex import OverlayIndex
+
+
+class TestOverlayIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = OverlayIndex({'foo1': 1}, {'foo2':2, 'foo3':3}, {'foo2':3, 'foo4':4 })
+
+
+    def test_precedence(self):
+        view = self.index.view({'foo3': 'top'})
+
+        self.assertEqual(view['foo1'], 1)
+        self.assertEqual(view['foo2'], 2)
+        self.assertEqual(view['foo3'], 'top')
+        self.assertEqual(view['foo4'], 4)
+
+        with self.assertRaises(KeyError):
+            view['foo7']
+
+
+    def test_view_keys(self):
+        self.assertEqual(set(self.index.view({'foo5': 5})),
+                         set(['foo1', 'foo2', 'foo3', 'foo4', 'foo5']))
+        self.assertEqual(set(self.index.view()), set(self.index.keys()))
@@ -0,0 +1,79 @@
+#
+# Copyright (c) 2026 - Adjacent Link LLC, Bridgewater, New Jersey
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in
+#   the documentation and/or other materials provided with the
+#   distribution.
+# * Neither the name of Adjacent Link LLC nor the names of its
+#   contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+
+import socket
+import threading
+import time
+import unittest
+
+from etce.platformimpl import PlatformImpl
+
+
+class TestWaitForSockets(unittest.TestCase):
+    def test_waits_for_listener(self):
+        server = socket.socket()
+
+        server.bind(('127.0.0.1', 0))
+
+        address = server.getsockname()
+
+        timer = threading.Timer(0.3, server.listen)
+
+        timer.start()
+
+        try:
+            starttime = time.time()
+
+            self.assertEqual(PlatformImpl().waitforsockets([address], 5), [])
+
+            self.assertLess(time.time() - starttime, 2)
+        finally:
+            timer.join()
+
+            server.close()
+
+
+    def test_timeout(self):
+        server = socket.socket()
+
+        server.bind(('127.0.0.1', 0))
+
+        address = server.getsockname()
+
+        try:
+            self.assertEqual(PlatformImpl().waitforsockets([address], 0.5), [address])
+        finally:
+            server.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+#
+# Copyright (c) 2026 - Adjacent Link LLC, Bridgewater, New Jersey
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in
+#   the documentation and/or other materials provided with the
+#   distribution.
+# * Neither the name of Adjacent Link LLC nor the names of its
+#   contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+
+import unittest
+
+try:
+    from etce.sshclient import SSHClient
+except ImportError:
+    SSHClient = None
+
+
+@unittest.skipIf(SSHClient is None, 'requires paramiko')
+class TestSSHClientResolution(unittest.TestCase):
+    def setUp(self):
+        # only the host resolution state, no connections
+        self.client = SSHClient.__new__(SSHClient)
+
+        self.client._local_addresses = set(['127.0.0.1'])
+
+        self.client._host_addresses = {}
+
+
+    def test_resolution_cache(self):
+        # differing paths never resolve the host
+        self.assertFalse(self.client.sourceisdestination('localhost', '/a', '/b'))
+        self.assertEqual(self.client._host_addresses, {})
+
+        self.assertTrue(self.client.sourceisdestination('localhost', '/a', '/a'))
+        self.assertEqual(self.client._host_addresses, {'localhost':'127.0.0.1'})
+
+        # later lookups use the recorded address
+        self.client._host_addresses['localhost'] = '192.0.2.1'
+
+        self.assertFalse(self.client.sourceisdestination('localhost', '/a', '/a'))
+
+        # hosts that do not resolve are recorded as not local
+        self.client._resolvehosts(['localhost', 'nosuchhost.invalid'])
+
+        self.assertEqual(self.client._host_addresses,
+                         {'localhost':'192.0.2.1', 'nosuchhost.invalid':None})
+        self.assertFalse(self.client.sourceisdestination('nosuchhost.invalid', '/a', '/a'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+#
+# Copyright (c) 2026 - Adjacent Link LLC, Bridgewater, New Jersey
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in
+#   the documentation and/or other materials provided with the
+#   distribution.
+# * Neither the name of Adjacent Link LLC nor the names of its
+#   contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from etce.stepsfiledoc import StepsFileDoc
+
+
+class TestStepsFileDoc(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+
+    def _write(self, content):
+        stepsfile = os.path.join(self.tmpdir, 'steps.xml')
+
+        with open(stepsfile, 'w') as f:
+            f.write(content)
+
+        return stepsfile
+
+
+    def test_concurrency(self):
+        stepsfile = self._write(
+            '<steps>\n'
+            '  <step name="start">\n'
+            '    <run wrapper="a"/>\n'
+            '  </step>\n'
+            '  <step name="check" concurrency="4">\n'
+            '    <run wrapper="a"/>\n'
+            '    <run wrapper="b"/>\n'
+            '    <run wrapper="c" after="a, b"/>\n'
+            '  </step>\n'
+            '</steps>\n')
+
+        doc = StepsFileDoc(stepsfile)
+
+        self.assertEqual(doc.getconcurrency('start'), 1)
+        self.assertEqual(doc.getconcurrency('check'), 4)
+        self.assertEqual([entry.after for entry, _, _ in doc.getwrappers('check')],
+                         [(), (), ('a', 'b')])
+
+
+    def test_after_must_be_earlier(self):
+        stepsfile = self._write(
+            '<steps>\n'
+            '  <step name="check" concurrency="2">\n'
+            '    <run wrapper="c" after="a"/>\n'
+            '    <run wrapper="a"/>\n'
+            '  </step>\n'
+            '</steps>\n')
+
+        with self.assertRaises(RuntimeError):
+            StepsFileDoc(stepsfile)
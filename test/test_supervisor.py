@@ -0,0 +1,149 @@
+#
+# Copyright (c) 2026 - Adjacent Link LLC, Bridgewater, New Jersey
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in
+#   the documentation and/or other materials provided with the
+#   distribution.
+# * Neither the name of Adjacent Link LLC nor the names of its
+#   contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from etce.supervisorclient import SupervisorClient
+
+
+class TestSupervisor(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+        self.client = SupervisorClient('@etce.supervisor.test.%d' % os.getpid())
+
+
+    def tearDown(self):
+        self.client.shutdown()
+
+        shutil.rmtree(self.tmpdir)
+
+
+    def wait_for(self, processid, state):
+        deadline = time.time() + 5.0
+
+        while time.time() < deadline:
+            record = self.client.status()[processid]
+
+            if record['state'] == state:
+                return record
+
+            time.sleep(0.05)
+
+        self.fail('process %d never reached state %s' % (processid, state))
+
+
+    def test_launch_and_exit(self):
+        logfile = os.path.join(self.tmpdir, 'out.log')
+
+        pidfile = os.path.join(self.tmpdir, 'out.pid')
+
+        processid = self.client.launch('sh -c "echo hello; exit 3"',
+                                       name='out',
+                                       stdout=logfile,
+                                       stderr=logfile,
+                                       pidfile=pidfile,
+                                       pidincrement=1)
+
+        record = self.wait_for(processid, 'exited')
+
+        self.assertEqual(record['returncode'], 3)
+        self.assertIsNotNone(record['rusage'])
+
+        with open(logfile) as logf:
+            self.assertEqual(logf.read(), 'hello\n')
+
+        with open(pidfile) as pidf:
+            self.assertEqual(int(pidf.read()), record['pid'] + 1)
+
+
+    def test_stop_and_shutdown(self):
+        processid = self.client.launch('sleep 30', name='sleeper')
+
+        pendingid = self.client.launch('sleep 30', starttime=time.time() + 60)
+
+        self.wait_for(processid, 'running')
+
+        result = self.client.stop('sleeper')
+
+        self.assertEqual(len(result['signalled']), 1)
+        self.assertEqual(result['failed'], [])
+
+        self.assertEqual(self.wait_for(processid, 'exited')['returncode'], -15)
+
+        self.client.stop()
+
+        self.assertEqual(self.client.status()[pendingid]['state'], 'cancelled')
+
+        self.client.shutdown()
+
+        self.assertFalse(self.client.running())
+
+
+    @unittest.skipUnless(os.geteuid() == 0, 'requires root to connect as another user')
+    def test_other_user_rejected(self):
+        self.client.start()
+
+        readfd, writefd = os.pipe()
+
+        pid = os.fork()
+
+        if pid == 0:
+            try:
+                os.close(readfd)
+
+                os.setuid(65534)
+
+                with self.client._connect() as sock:
+                    sock.sendall(b'{"request": "status"}\n')
+
+                    os.write(writefd, sock.makefile('rb').readline())
+            finally:
+                os._exit(0)
+
+        os.close(writefd)
+
+        with os.fdopen(readfd) as readf:
+            response = readf.read()
+
+        os.waitpid(pid, 0)
+
+        self.assertIn('error', json.loads(response))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+#
+# Copyright (c) 2026 - Adjacent Link LLC, Bridgewater, New Jersey
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in
+#   the documentation and/or other materials provided with the
+#   distribution.
+# * Neither the name of Adjacent Link LLC nor the names of its
+#   contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from etce.templateutils import format_file, format_string, get_files_overlays, is_template_file, TemplateError
+
+
+class TestIsTemplateFile(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+
+    def _write(self, name, content):
+        filename = os.path.join(self.tmpdir, name)
+
+        with open(filename, 'wb') as f:
+            f.write(content)
+
+        return filename
+
+
+    def test_plain(self):
+        for content in (b'', b'a = 1\nb = $HOME\n', b'100% sure\n', b'\x00\x01\xff\xfe'):
+            self.assertFalse(is_template_file(self._write('plain', content)))
+
+
+    def test_template(self):
+        for content in (b'a = ${foo}\n',
+                        b'<%include file="x"/>\n',
+                        b'  % for i in range(3):\n',
+                        b'## a mako comment\n',
+                        b'line \\\ncontinued\n'):
+            self.assertTrue(is_template_file(self._write('template', content)))
+
+
+    def test_plain_renders_unchanged(self):
+        content = b'key = value\n# comment\n100% done, $5\n'
+
+        srcfile = self._write('src', content)
+
+        dstfile = os.path.join(self.tmpdir, 'dst')
+
+        format_file(srcfile, dstfile, {})
+
+        self.assertFalse(is_template_file(srcfile))
+
+        with open(dstfile, 'rb') as f:
+            self.assertEqual(f.read(), content)
+
+
+    def test_cache_invalidated_on_change(self):
+        filename = self._write('changing', b'plain\n')
+
+        self.assertFalse(is_template_file(filename))
+
+        with open(filename, 'ab') as f:
+            f.write(b'${foo}\n')
+
+        self.assertTrue(is_template_file(filename))
+
+
+class TestFileOverlays(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+
+    def test_referenced_names(self):
+        content = 'a = ${foo} ${len(bar)}\n' \
+                  '% for i in range(count):\n' \
+                  'b = ${i} ${loop.index}\n' \
+                  '% endfor\n' \
+                  '<% x = y + 1 %>\n' \
+                  '${x}\n' \
+                  '<%def name="f(a)">${a} ${z}</%def>\n' \
+                  '${f(3)} ${etce_hostname | h}\n'
+
+        templatefile = os.path.join(self.tmpdir, 'template')
+
+        with open(templatefile, 'w') as f:
+            f.write(content)
+
+        plainfile = os.path.join(self.tmpdir, 'plain')
+
+        with open(plainfile, 'wb') as f:
+            f.write(b'\x00\xff no markup')
+
+        self.assertEqual(get_files_overlays([templatefile, plainfile]),
+                         {templatefile: frozenset(['foo', 'bar', 'count', 'y', 'z', 'etce_hostname']),
+                          plainfile: frozenset()})
+
+
+    def test_invalid_utf8(self):
+        templatefile = os.path.join(self.tmpdir, 'binary')
+
+        with open(templatefile, 'wb') as f:
+            f.write(b'${foo} \xff\xfe\n')
+
+        with self.assertRaises(TemplateError):
+            get_files_overlays([templatefile])
+
+
+class TestFormatString(unittest.TestCase):
+    def test_literal(self):
+        for literal in ('veth0', '10.0.0.1/24', '100% $5'):
+            self.assertEqual(format_string(literal, {}), literal)
+
+
+    def test_render(self):
+        for index in range(3):
+            self.assertEqual(format_string('node-${lxc_index}', {'lxc_index':index}),
+                             'node-%d' % index)
+
+
+    def test_missing_overlay(self):
+        with self.assertRaises(TemplateError):
+            format_string('${missing}', {'present':1})
@@ -0,0 +1,77 @@
+#
+# Copyright (c) 2026 - Adjacent Link LLC, Bridgewater, New Jersey
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in
+#   the documentation and/or other materials provided with the
+#   distribution.
+# * Neither the name of Adjacent Link LLC nor the names of its
+#   contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+
+import os
+import unittest
+
+import etce.utils
+
+
+class TestCloseFds(unittest.TestCase):
+    def test_close_fds(self):
+        readfd, writefd = os.pipe()
+
+        opened = [ os.open(os.devnull, os.O_RDONLY) for _ in range(4) ]
+
+        pid = os.fork()
+
+        if pid == 0:
+            etce.utils.close_fds(keep=(writefd,))
+
+            # report the descriptors left open
+            remaining = []
+            for fd in range(max(opened) + 1):
+                try:
+                    os.fstat(fd)
+                    remaining.append(fd)
+                except OSError:
+                    pass
+
+            os.write(writefd, ','.join(map(str, remaining)).encode())
+            os._exit(0)
+
+        os.close(writefd)
+
+        remaining = os.read(readfd, 1024).decode()
+
+        os.waitpid(pid, 0)
+
+        os.close(readfd)
+
+        for fd in opened:
+            os.close(fd)
+
+        self.assertEqual(remaining, str(writefd))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+#
+# Copyright (c) 2026 - Adjacent Link LLC, Bridgewater, New Jersey
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in
+#   the documentation and/or other materials provided with the
+#   distribution.
+# * Neither the name of Adjacent Link LLC nor the names of its
+#   contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import etce.wrappercontextimpl
+from etce.wrappercontextimpl import WrapperContextImpl
+
+
+class TestBuildCommandstr(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+        self.ctx = WrapperContextImpl.__new__(WrapperContextImpl)
+
+        self.ctx._sudo = False
+
+        etce.wrappercontextimpl._executable_cache.clear()
+
+
+    def tearDown(self):
+        etce.wrappercontextimpl._executable_cache.clear()
+
+        shutil.rmtree(self.tmpdir)
+
+
+    def _executable(self, directory, name):
+        os.makedirs(directory, exist_ok=True)
+
+        filename = os.path.join(directory, name)
+
+        with open(filename, 'w') as f:
+            f.write('#!/bin/sh\n')
+
+        os.chmod(filename, 0o755)
+
+        return filename
+
+
+    def test_cache(self):
+        bindir = os.path.join(self.tmpdir, 'bin')
+
+        found = self._executable(bindir, 'etcetestcmd')
+
+        self.assertEqual(self.ctx._build_commandstr('etcetestcmd', '-a', [bindir]),
+                         found + ' -a')
+
+        # a cached path is used without searching again
+        key = [key for key in etce.wrappercontextimpl._executable_cache
+               if key[0] == 'etcetestcmd'][0]
+
+        cached = self._executable(os.path.join(self.tmpdir, 'cached'), 'etcetestcmd')
+
+        etce.wrappercontextimpl._executable_cache[key] = cached
+
+        self.assertEqual(self.ctx._build_commandstr('etcetestcmd', '-a', [bindir]),
+                         cached + ' -a')
+
+        # entries are keyed by the search path
+        otherdir = os.path.join(self.tmpdir, 'other')
+
+        other = self._executable(otherdir, 'etcetestcmd')
+
+        self.assertEqual(self.ctx._build_commandstr('etcetestcmd', '-a', [otherdir]),
+                         other + ' -a')
+
+        # a removed executable is searched for again
+        os.remove(cached)
+
+        self.assertEqual(self.ctx._build_commandstr('etcetestcmd', '-a', [bindir]),
+                         found + ' -a')
+
+        self.assertEqual(etce.wrappercontextimpl._executable_cache[key], found)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+#
+# Copyright (c) 2026 - Adjacent Link LLC, Bridgewater, New Jersey
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in
+#   the documentation and/or other materials provided with the
+#   distribution.
+# * Neither the name of Adjacent Link LLC nor the names of its
+#   contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import etce.wrapper
+
+from etce.wrapperloader import WrapperLoader
+
+
+class TestWrapperLoader(unittest.TestCase):
+    def test_loadwrapper(self):
+        fullname1, instance1 = WrapperLoader().loadwrapper('utils.interfacecheck')
+
+        fullname2, instance2 = WrapperLoader().loadwrapper('utils.interfacecheck')
+
+        self.assertEqual(fullname1, 'utils.interfacecheck')
+        self.assertEqual(fullname1, fullname2)
+        self.assertIs(type(instance1), type(instance2))
+        self.assertIsNot(instance1, instance2)
+
+        with self.assertRaises(RuntimeError):
+            WrapperLoader().loadwrapper('utils.nosuchwrapper')
+
+
+    def test_registration(self):
+        _, instance = WrapperLoader().loadwrapper('utils.interfacecheck')
+
+        registration = WrapperLoader.registration(instance)
+
+        self.assertIn(('register_infile_name', ('interfacecheck.flag',)), registration)
+        self.assertEqual(registration, WrapperLoader.registration(instance))
+
+        # register setting up instance state is not replayed
+        class StatefulWrapper(etce.wrapper.Wrapper):
+            def register(self, registrar):
+                self.infile = 'stateful.flag'
+
+                registrar.register_infile_name(self.infile)
+
+        self.assertIsNone(WrapperLoader.registration(StatefulWrapper()))
+
+
+    def test_wrapperindex(self):
+        tmpdir = tempfile.mkdtemp()
+
+        try:
+            indexfile = os.path.join(tmpdir, 'wrapperindex.json')
+
+            index = WrapperLoader().wrapperindex(indexfile)
+
+            self.assertTrue(os.path.isfile(indexfile))
+            self.assertEqual(set(index), set(WrapperLoader().loadwrappers()))
+            self.assertEqual(index, WrapperLoader().wrapperindex(indexfile))
+        finally:
+            shutil.rmtree(tmpdir)
+
+
+    def test_wrapperindex_dependencies(self):
+        tmpdir = tempfile.mkdtemp()
+
+        try:
+            indexfile = os.path.join(tmpdir, 'wrapperindex.json')
+
+            WrapperLoader().wrapperindex(indexfile)
+
+            with open(indexfile) as indexf:
+                cached = json.load(indexf)
+
+            basefile = os.path.abspath(etce.wrapper.__file__)
+
+            # a changed base class module invalidates its wrappers
+            for entry in cached.values():
+                if basefile in entry['filestates']:
+                    entry['filestates'][basefile] = [0, 0]
+
+            with open(indexfile, 'w') as indexf:
+                json.dump(cached, indexf)
+
+            WrapperLoader().wrapperindex(indexfile)
+
+            with open(indexfile) as indexf:
+                recached = json.load(indexf)
+
+            st = os.stat(basefile)
+
+            for entry in recached.values():
+                if basefile in entry['filestates']:
+                    self.assertEqual(entry['filestates'][basefile], [st.st_mtime_ns, st.st_size])
+
+            # a module that fails to import is retried on every call
+            failed = WrapperLoader()._indexentry('etcewrappers.utils.nosuchwrapper', basefile)
+
+            self.assertIsNone(failed['name'])
+            self.assertIsNone(failed['filestates'])
+
+            # tuple and object defaults would not come back unchanged
+            loader = WrapperLoader()
+
+            self.assertTrue(loader._isjsonnative([('register_argument', ('a', 1, 'b'))]))
+            self.assertFalse(loader._isjsonnative([('register_argument', ('a', (1, 2), 'b'))]))
+            self.assertFalse(loader._isjsonnative([('register_argument', ('a', object(), 'b'))]))
+        finally:
+            shutil.rmtree(tmpdir)
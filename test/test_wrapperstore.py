@@ -0,0 +1,119 @@
+#
+# Copyright (c) 2026 - Adjacent Link LLC, Bridgewater, New Jersey
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# * Redistributions of source code must retain the above copyright
+#   notice, this list of conditions and the following disclaimer.
+# * Redistributions in binary form must reproduce the above copyright
+#   notice, this list of conditions and the following disclaimer in
+#   the documentation and/or other materials provided with the
+#   distribution.
+# * Neither the name of Adjacent Link LLC nor the names of its
+#   contributors may be used to endorse or promote products derived
+#   from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+#
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from etce.wrapperstore import WrapperStore
+
+
+class TestWrapperStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+        self.storefile = os.path.join(self.tmpdir, 'etce.store')
+
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+
+    def _contents(self):
+        with open(self.storefile) as f:
+            return json.load(f)
+
+
+    def test_sections(self):
+        store = WrapperStore(self.storefile)
+
+        store.update({'etce':{'starttime':'now'}}, 'node-1')
+        store.update({'emane':{'version':'1.2'}}, 'node-1')
+        store.update({'top':1})
+
+        self.assertEqual(self._contents(),
+                         {'node-1':{'etce':{'starttime':'now'}, 'emane':{'version':'1.2'}},
+                          'top':1})
+
+
+    def test_shared_and_external_changes(self):
+        store1 = WrapperStore(self.storefile)
+
+        store2 = WrapperStore(self.storefile)
+
+        store1.update({'a':1})
+
+        store2.update({'b':2})
+
+        # another process rewrites the file
+        with open(self.storefile, 'w') as f:
+            json.dump({'c':3, 'filler':'x' * 10}, f)
+
+        store1.update({'d':4})
+
+        self.assertEqual(store2.read(), {'c':3, 'filler':'x' * 10, 'd':4})
+
+
+    def test_batch(self):
+        store = WrapperStore(self.storefile)
+
+        with store.batch():
+            for i in range(10):
+                store.update({'wrapper%d' % i:{'value':i}}, 'node-1')
+
+            self.assertFalse(os.path.exists(self.storefile))
+
+        self.assertEqual(len(self._contents()['node-1']), 10)
+
+
+    def test_deferred(self):
+        store = WrapperStore(self.storefile, deferred=True)
+
+        values = {'etce':{'starttime':'now'}}
+
+        store.update(values, 'node-1')
+        store.update({'emane':{'version':'1.2'}}, 'node-1')
+
+        # changes after update are not stored
+        values['etce']['starttime'] = 'later'
+
+        self.assertFalse(os.path.exists(self.storefile))
+
+        store.flush()
+
+        self.assertEqual(self._contents(),
+                         {'node-1':{'etce':{'starttime':'now'}, 'emane':{'version':'1.2'}}})
+
+        # nothing is left beside the store
+        self.assertEqual(os.listdir(self.tmpdir), ['etce.store'])